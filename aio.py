@@ -0,0 +1,163 @@
+"""asyncio facade over database.py.
+
+Every reader and writer in database.py has an awaitable counterpart on
+AsyncDatabase with the same arguments minus `conn`, and every iter_* reader
+is an async generator:
+
+    async with AsyncDatabase('budget.db') as adb:
+        await adb.add_expense((12.5, 'Food', '2024-01-01', '12:00:00'))
+        total = await adb.get_total_expenses()
+        async for row in adb.iter_transactions():
+            ...
+
+Calls run on a bounded thread pool: reads check out a connection from the
+ConnectionManager's reader pool and writes take the shared writer, so the
+event loop never blocks on SQLite. Cancelling a call that is still queued
+drops it; cancelling one that is already running interrupts its SQL
+statement with sqlite3's Connection.interrupt().
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import database as db
+from pool import ConnectionManager
+
+READ_FUNCTIONS = (
+    'get_all_expenses', 'get_total_expenses', 'get_all_income', 'get_latest_income',
+    'get_total_income', 'get_all_budgets', 'get_all_savings_goals',
+    'get_all_transactions', 'get_expenses_by_category', 'get_recent_expenses',
+    'get_recent_savings', 'get_top_expenses', 'get_expenses_page', 'get_income_page',
+    'get_transactions_page', 'get_rollup', 'verify_totals', 'get_schema_version',
+    'explain_query_plan', 'check_query_plans', 'search', 'get_categories', 'get_sources',
+    'get_data_version', 'get_change_counters', 'get_column_rows', 'get_table_view_page',
+    'get_max_ids', 'get_table_view_seen', 'get_database_file',
+)
+ITER_FUNCTIONS = (
+    'iter_expenses', 'iter_income', 'iter_budgets', 'iter_savings_goals',
+    'iter_transactions',
+)
+ITER_BATCH_SIZE = 500
+
+
+class AsyncDatabase:
+    """Awaitable versions of the database.py functions over a ConnectionManager."""
+
+    def __init__(self, db_file=db.DB_FILE, config='desktop-safe', manager=None,
+                 max_workers=None):
+        self.manager = manager or ConnectionManager(db_file, config)
+        self._owns_manager = manager is None
+        # One worker per reader connection plus one for the writer; more
+        # threads would only queue up inside the pool.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.manager.max_readers + 1,
+            thread_name_prefix='budgetpal-aio')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _submit(self, fn, conn_slot):
+        """Run fn on the executor; conn_slot[0] is the connection to interrupt."""
+        future = self._executor.submit(fn)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel() and conn_slot and conn_slot[0] is not None:
+                conn_slot[0].interrupt()
+            raise
+
+    async def _call(self, checkout, func, args, kwargs):
+        conn_slot = [None]
+
+        def run():
+            with checkout() as conn:
+                conn_slot[0] = conn
+                try:
+                    return func(conn, *args, **kwargs)
+                finally:
+                    conn_slot[0] = None
+        return await self._submit(run, conn_slot)
+
+    async def run_read(self, func, *args, **kwargs):
+        """Await func(conn, *args, **kwargs) on a pooled reader connection."""
+        return await self._call(self.manager.reader, func, args, kwargs)
+
+    async def run_write(self, func, *args, **kwargs):
+        """Await func(conn, *args, **kwargs) on the writer connection.
+
+        Use this with db.transaction() to make several writes atomic.
+        """
+        return await self._call(self.manager.writer, func, args, kwargs)
+
+    async def iterate(self, func, *args, batch_size=ITER_BATCH_SIZE, **kwargs):
+        """Async-iterate a database.py generator, batch_size rows per executor hop.
+
+        The reader connection stays checked out until the iteration ends and
+        is handed from worker thread to worker thread between batches.
+        """
+        acquire = self._executor.submit(self.manager.acquire_reader)
+        try:
+            conn = await asyncio.wrap_future(acquire)
+        except asyncio.CancelledError:
+            acquire.add_done_callback(self._release_abandoned)
+            raise
+        rows = None
+        pending = None
+
+        def next_batch():
+            nonlocal rows
+            conn.owner = threading.get_ident()
+            if rows is None:
+                rows = func(conn, *args, **kwargs)
+            return list(islice(rows, batch_size))
+
+        def finish():
+            conn.owner = threading.get_ident()
+            if rows is not None:
+                rows.close()
+            self.manager.release_reader(conn)
+
+        try:
+            while True:
+                pending = self._executor.submit(next_batch)
+                try:
+                    batch = await asyncio.wrap_future(pending)
+                except asyncio.CancelledError:
+                    if not pending.cancel():
+                        conn.interrupt()
+                    raise
+                if not batch:
+                    return
+                for row in batch:
+                    yield row
+        finally:
+            # The generator must not be closed while a batch is still running
+            # on another thread, so wait for that batch first.
+            if pending is not None and not pending.done():
+                await asyncio.shield(asyncio.wait([asyncio.wrap_future(pending)]))
+            await asyncio.shield(asyncio.wrap_future(self._executor.submit(finish)))
+
+    def _release_abandoned(self, future):
+        # The caller was cancelled while the checkout was in flight.
+        if not future.cancelled() and future.exception() is None:
+            conn = future.result()
+            conn.owner = threading.get_ident()
+            self.manager.release_reader(conn)
+
+    async def aclose(self):
+        """Shut down the executor and, if this facade created it, the manager."""
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._executor.shutdown, True)
+        if self._owns_manager:
+            self.manager.close()
+
+
+# Read and write methods return the awaitable of run_read() or run_write();
+# iter_* methods return iterate()'s async generator.
+db.add_facade_methods(AsyncDatabase, READ_FUNCTIONS, 'run_read')
+db.add_facade_methods(AsyncDatabase, db.WRITE_FUNCTIONS, 'run_write')
+db.add_facade_methods(AsyncDatabase, ITER_FUNCTIONS, 'iterate')
@@ -0,0 +1,92 @@
+"""How long the window stops painting while refresh_all_data() runs.
+
+Usage: python benchmarks/bench_refresh_frames.py [rows]
+
+Builds a throwaway budget.db with `rows` expenses (1,000,000 by default)
+and a tenth as many income entries, opens the main window on it, and
+refreshes it while a 60 fps timer ticks. Each page is then visited in
+turn, as its deferred loads run when it is shown. Reported per step is
+the longest gap between ticks: anything above ~17 ms is a dropped frame,
+and it is how long a click would wait.
+
+Runs offscreen unless QT_QPA_PLATFORM says otherwise.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+import database as db
+from sample_ledger import build
+
+FRAME_MS = 16
+PAGES = ('dashboard', 'income', 'expenses', 'budget', 'savings', 'reports', 'history', 'settings')
+
+
+class FrameClock:
+    """Records the longest gap between ticks of a FRAME_MS timer."""
+
+    def __init__(self):
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(FRAME_MS)
+        self.reset()
+
+    def reset(self):
+        self.last = time.perf_counter()
+        self.worst = 0.0
+        self.dropped = 0
+
+    def tick(self):
+        now = time.perf_counter()
+        gap = now - self.last
+        self.worst = max(self.worst, gap)
+        self.dropped += int(gap * 1000 // FRAME_MS) - 1 if gap * 1000 > 1.5 * FRAME_MS else 0
+        self.last = now
+
+
+def settle(app, window, clock):
+    """Run the event loop until background loads are done, then a few frames more."""
+    jobs = getattr(window, 'jobs', None)
+    start = time.perf_counter()
+    while jobs is not None and jobs._running:
+        app.processEvents()
+        time.sleep(0.001)
+    end = time.perf_counter() + 0.1
+    while time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.001)
+    return time.perf_counter() - start - 0.1
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        print(f"Building {rows:,} expenses and {rows // 10:,} income entries...")
+        build(db.DB_FILE, rows, income_rows=rows // 10)
+        import main as budgetpal
+        window = budgetpal.MainWindow()
+        window.show()
+        clock = FrameClock()
+        settle(app, window, clock)
+        steps = [('refresh_all_data', window.refresh_all_data)]
+        steps += [(f"show {name}", lambda page=page: window.ui.stackedWidget.setCurrentIndex(page))
+                  for page, name in enumerate(PAGES)]
+        for name, step in steps:
+            clock.reset()
+            step()
+            loading = settle(app, window, clock)
+            print(f"{name:<18} worst frame {clock.worst * 1000:7.1f} ms  "
+                  f"dropped {clock.dropped:4d}  loaded in {loading:5.2f}s")
+        window.close()
+
+
+if __name__ == '__main__':
+    main()
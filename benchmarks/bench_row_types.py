@@ -0,0 +1,107 @@
+"""Memory and build time of fetchall() with different row types.
+
+Usage: python benchmarks/bench_row_types.py [rows]
+
+Fills an in-memory table shaped like the expenses reader's result
+(amount, date, time, category) with `rows` rows (1,000,000 by default) and
+fetches all of them once per row type:
+
+    tuple        sqlite3's default
+    Row          sqlite3.Row
+    dict         {column: value}
+    namedtuple   Expense._make(row)
+    slots        a class with __slots__ for the four fields
+    rows.py      rows.row_factory(), as the readers use it, once building a
+                 namedtuple without a Money field and once building
+                 rows.Expense, whose amount becomes Money
+
+Memory is what tracemalloc sees still allocated once the list has been
+fetched. Every type holds the same column values, so the differences come
+from the row objects themselves.
+"""
+import gc
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import rows
+
+PlainExpense = namedtuple('PlainExpense', 'amount date time category')
+# No 'amount' field, so rows.row_factory() leaves the integer alone.
+RawExpense = namedtuple('RawExpense', 'cents date time category')
+
+
+class SlotsExpense:
+    __slots__ = ('amount', 'date', 'time', 'category')
+
+    def __init__(self, amount, date, time, category):
+        self.amount = amount
+        self.date = date
+        self.time = time
+        self.category = category
+
+
+def dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+FACTORIES = {
+    'tuple': None,
+    'Row': sqlite3.Row,
+    'dict': dict_factory,
+    'namedtuple': lambda cursor, row: PlainExpense._make(row),
+    'slots': lambda cursor, row: SlotsExpense(*row),
+    'rows.py': rows.row_factory(RawExpense),
+    'rows.py+Money': rows.row_factory(rows.Expense),
+}
+
+
+def build(rows_wanted):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE expenses (amount integer, date text, time text, category text)")
+    conn.executemany("INSERT INTO expenses VALUES (?, ?, ?, ?)",
+                     ((i % 500000, f"20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                       "12:00:00", f"Category {i % 40}") for i in range(rows_wanted)))
+    return conn
+
+
+def fetch_all(conn, factory):
+    cur = conn.cursor()
+    if factory is not None:
+        cur.row_factory = factory
+    cur.execute("SELECT amount, date, time, category FROM expenses")
+    return cur.fetchall()
+
+
+def measure(conn, name, factory):
+    # Time and memory come from separate runs: tracing slows allocation down.
+    gc.collect()
+    start = time.perf_counter()
+    fetched = fetch_all(conn, factory)
+    elapsed = time.perf_counter() - start
+    count = len(fetched)
+    del fetched
+    gc.collect()
+    tracemalloc.start()
+    fetched = fetch_all(conn, factory)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del fetched
+    print(f"{name:<14} rows={count:>9,}  time={elapsed:6.2f}s  "
+          f"memory={size / (1024 * 1024):8.1f} MiB  ({size / count:6.1f} B/row)")
+
+
+def main():
+    rows_wanted = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Building {rows_wanted:,} rows...")
+    conn = build(rows_wanted)
+    for name, factory in FACTORIES.items():
+        measure(conn, name, factory)
+
+
+if __name__ == '__main__':
+    main()
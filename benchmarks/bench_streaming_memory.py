@@ -0,0 +1,60 @@
+"""Peak memory of reading the whole expenses table: fetchall() vs iter_*().
+
+Usage: python benchmarks/bench_streaming_memory.py [rows]
+
+Builds a throwaway database with `rows` expenses (1,000,000 by default),
+then reads it back in a fresh process per reader so that each peak RSS is
+measured on its own. The streaming readers should stay flat no matter how
+many rows there are; fetchall() grows with the table.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import database as db
+from sample_ledger import build
+
+READERS = {
+    'get_all_expenses': lambda conn: db.get_all_expenses(conn),
+    'iter_expenses': lambda conn: db.iter_expenses(conn),
+    'iter_transactions': lambda conn: db.iter_transactions(conn),
+}
+
+
+def peak_rss_mib():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(path, reader):
+    conn = db.create_connection(path)
+    before = peak_rss_mib()
+    start = time.perf_counter()
+    count = 0
+    for _ in READERS[reader](conn):
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"{reader:<20} rows={count:>9,}  time={elapsed:6.2f}s  "
+          f"peak RSS +{peak_rss_mib() - before:8.1f} MiB")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3])
+        return
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"Building {rows:,} expenses...")
+        build(path, rows)
+        for reader in READERS:
+            subprocess.run([sys.executable, __file__, '--measure', path, reader], check=True)
+
+
+if __name__ == '__main__':
+    main()
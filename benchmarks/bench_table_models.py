@@ -0,0 +1,100 @@
+"""Time and memory of filling the expense table: QTableWidget vs LedgerTableModel.
+
+Usage: python benchmarks/bench_table_models.py [rows]
+
+Builds a throwaway database with `rows` expenses (100,000 by default) and
+loads them in a fresh process per loader, so each one's memory is measured
+on its own:
+
+    QTableWidget       what load_expenses() used to do: insertRow() and a
+                       QTableWidgetItem(str(value)) per cell
+    LedgerTableModel   table_models.py as a view opens it: the first page
+    ...scrolled        the same model after fetching every page, of which
+                       it holds only the last MAX_PAGES
+
+Both run offscreen unless QT_QPA_PLATFORM says otherwise.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+import database as db
+from sample_ledger import build
+from table_models import LedgerTableModel, table_view
+
+HEADERS = ['Amount', 'Date', 'Time', 'Category']
+
+
+def fill_widget(conn):
+    table = QTableWidget(0, len(HEADERS))
+    for r, rd in enumerate(db.get_all_expenses(conn)):
+        table.insertRow(r)
+        for c, d in enumerate(rd):
+            table.setItem(r, c, QTableWidgetItem(str(d)))
+    return table, table.rowCount()
+
+
+def fill_model(conn):
+    model = LedgerTableModel('expenses', HEADERS, conn)
+    model.reload()
+    return (model, table_view(None, model)), model.rowCount()
+
+
+def fill_model_scrolled(conn):
+    (model, view), _ = fill_model(conn)
+    while model.canFetchMore():
+        model.fetchMore()
+    return (model, view), model.rowCount()
+
+
+LOADERS = {
+    'QTableWidget': fill_widget,
+    'LedgerTableModel': fill_model,
+    '...scrolled': fill_model_scrolled,
+}
+
+
+def rss_mib():
+    # The model's arrays are small next to the peak reached while Qt starts
+    # up, so read the current RSS where /proc has it.
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(path, loader):
+    app = QApplication([])
+    conn = db.create_connection(path)
+    before = rss_mib()
+    start = time.perf_counter()
+    table, count = LOADERS[loader](conn)
+    elapsed = time.perf_counter() - start
+    print(f"{loader:<18} rows={count:>9,}  time={elapsed:6.2f}s  "
+          f"RSS +{rss_mib() - before:8.1f} MiB")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3])
+        return
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"Building {rows:,} expenses...")
+        build(path, rows)
+        for loader in LOADERS:
+            subprocess.run([sys.executable, __file__, '--measure', path, loader], check=True)
+
+
+if __name__ == '__main__':
+    main()
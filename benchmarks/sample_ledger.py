@@ -0,0 +1,31 @@
+"""Throwaway BudgetPal databases for the benchmarks to run against.
+
+    from sample_ledger import build
+    build(path, 1_000_000, income_rows=100_000)
+
+Expenses spread over 40 categories and income over 8 sources, with dates
+from 2010 to 2024, so that the grouping and date-ordered readers have
+realistic work to do.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import database as db
+
+
+def build(path, rows, income_rows=0):
+    """Create the database at path with `rows` expenses and `income_rows` income entries."""
+    conn = db.create_connection(path, 'bulk-ingest')
+    db.create_all_tables(conn)
+    expenses = ((i % 5000 + 0.25, f"Category {i % 40}", _date(i), "12:00:00")
+                for i in range(rows))
+    db.add_expenses_bulk(conn, expenses, chunk_size=50000)
+    income = ((1000 + i % 500, f"Source {i % 8}", _date(i), "")
+              for i in range(income_rows))
+    db.add_income_bulk(conn, income, chunk_size=50000)
+    conn.close()
+
+
+def _date(i):
+    return f"20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}"
@@ -0,0 +1,163 @@
+"""In-memory cache for the database.py readers.
+
+Each cached result is stored together with the version numbers of the
+tables it was read from: their change_counters, which triggers bump in the
+same transaction as every write, whichever connection or process makes it.
+A lookup reads the counters in the same snapshot as the query would run,
+so it only hits while none of its tables have changed since the result was
+read. An expense insert therefore leaves the cached income, budget and
+savings results alone. Results are kept per database file.
+
+    queries = CachedReaders(QueryCache(max_entries=128))
+    rows = queries.get_all_expenses(conn)     # miss: runs the query
+    rows = queries.get_all_expenses(conn)     # hit
+
+Inside a db.read_snapshot() block, everything read through the cache and
+directly from database.py describes the same commit.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+
+import database as db
+
+# Base tables each reader depends on.
+READER_TABLES = {
+    'get_all_expenses': ('expenses',),
+    'get_total_expenses': ('expenses',),
+    'get_expenses_by_category': ('expenses',),
+    'get_recent_expenses': ('expenses',),
+    'get_top_expenses': ('expenses',),
+    'get_expenses_page': ('expenses',),
+    'get_categories': ('expenses',),
+    'get_all_income': ('income',),
+    'get_latest_income': ('income',),
+    'get_total_income': ('income',),
+    'get_income_page': ('income',),
+    'get_sources': ('income',),
+    'get_all_budgets': ('budgets',),
+    'get_all_savings_goals': ('savings_goals',),
+    'get_recent_savings': ('savings_goals',),
+    'get_all_transactions': ('income', 'expenses'),
+    'get_transactions_page': ('income', 'expenses'),
+    'get_rollup': ('income', 'expenses'),
+    'search': ('expenses', 'income', 'budgets', 'savings_goals'),
+}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+    entries: int = 0
+    rows: int = 0
+
+
+def _weight(result):
+    return len(result) if isinstance(result, list) else 1
+
+
+class QueryCache:
+    """LRU cache of reader results, invalidated by table version.
+
+    max_entries bounds the number of cached calls and max_rows the total
+    number of rows held across them; the least recently used entries are
+    evicted first when either limit is exceeded. A single result larger
+    than max_rows is returned but not cached.
+    """
+
+    def __init__(self, max_entries=256, max_rows=200_000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.stats = CacheStats()
+        self._entries = OrderedDict()   # key -> (versions, weight, result)
+        self._lock = threading.Lock()
+
+    def call(self, func, tables, conn, *args, **kwargs):
+        """Return func(conn, *args, **kwargs), from the cache when still current.
+
+        Reads inside a db.transaction() block may see writes that are later
+        rolled back, so they bypass the cache.
+        """
+        if db.in_transaction_block(conn):
+            return func(conn, *args, **kwargs)
+        with db.read_snapshot(conn):
+            return self._call(func, tables, conn, args, kwargs)
+
+    def _call(self, func, tables, conn, args, kwargs):
+        key = (_database(conn), func.__name__, args, tuple(sorted(kwargs.items())))
+        counters = db.get_change_counters(conn)
+        versions = tuple(counters.get(table, 0) for table in tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == versions:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return _copy(entry[2])
+                self.stats.stale += 1
+                self._remove(key)
+            self.stats.misses += 1
+        result = func(conn, *args, **kwargs)
+        weight = _weight(result)
+        if weight <= self.max_rows:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (versions, weight, result)
+                self.stats.rows += weight
+                self._evict()
+                self.stats.entries = len(self._entries)
+        return _copy(result)
+
+    def cached(self, func, tables):
+        """Wrap a reader so that calls go through this cache."""
+        @wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            return self.call(func, tables, conn, *args, **kwargs)
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats.entries = self.stats.rows = 0
+
+    def _remove(self, key):
+        _, weight, _ = self._entries.pop(key)
+        self.stats.rows -= weight
+        self.stats.entries = len(self._entries)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self.stats.rows > self.max_rows):
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+
+def _database(conn):
+    """The file conn has open; an in-memory database is its connection's own."""
+    return db.get_database_file(conn) or id(conn)
+
+
+def _copy(result):
+    # Callers may sort or reverse what they get back; keep the cached list intact.
+    return result[:] if isinstance(result, list) else result
+
+
+class CachedReaders:
+    """database.py with the readers in READER_TABLES served through a QueryCache.
+
+    Any other attribute is looked up on database.py itself, so this can stand
+    in for the module: queries.add_expense(...) is db.add_expense(...).
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or QueryCache()
+        for name, tables in READER_TABLES.items():
+            setattr(self, name, self.cache.cached(getattr(db, name), tables))
+
+    def __getattr__(self, name):
+        return getattr(db, name)
@@ -0,0 +1,26 @@
+"""Calling back into code that must not take the caller down with it.
+
+The window hands its work out to many independent callbacks: event
+handlers, the deliveries of background jobs, page refreshes, change
+listeners. When one of them fails the others should still run, so each is
+called through call_isolated(), which logs the error with its traceback
+and carries on:
+
+    for handler in handlers:
+        call_isolated(f"handling {type(event).__name__}", handler, event)
+"""
+import logging
+
+log = logging.getLogger('budgetpal')
+
+
+def call_isolated(what, callback, *args):
+    """Return callback(*args), or None after logging the Exception it raised.
+
+    what completes the log message "Error <what>".
+    """
+    try:
+        return callback(*args)
+    except Exception:
+        log.exception("Error %s", what)
+        return None
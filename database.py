@@ -1,210 +1,1831 @@
-import sqlite3
-from sqlite3 import Error
-
-def create_connection():
-    """Create a database connection to the SQLite database."""
-    conn = None
-    try:
-        conn = sqlite3.connect('budget.db')
-        return conn
-    except Error as e:
-        print(e)
-    return conn
-
-def create_all_tables(conn):
-    """Create all necessary tables if they don't exist."""
-    sql_statements = [
-        """ CREATE TABLE IF NOT EXISTS expenses (
-                id integer PRIMARY KEY,
-                amount real NOT NULL,
-                category text NOT NULL,
-                date text NOT NULL,
-                time text NOT NULL
-            ); """,
-        """ CREATE TABLE IF NOT EXISTS income (
-                id integer PRIMARY KEY,
-                amount real NOT NULL,
-                source text NOT NULL,
-                date text NOT NULL,
-                notes text
-            ); """,
-        """ CREATE TABLE IF NOT EXISTS budgets (
-                id integer PRIMARY KEY,
-                name text NOT NULL,
-                amount real NOT NULL,
-                date text NOT NULL
-            ); """,
-        """ CREATE TABLE IF NOT EXISTS savings_goals (
-                id integer PRIMARY KEY,
-                goal text NOT NULL,
-                date text NOT NULL
-            ); """
-    ]
-    try:
-        c = conn.cursor()
-        for statement in sql_statements:
-            c.execute(statement)
-    except Error as e:
-        print(e)
-
-def reset_database(conn):
-    """Deletes all records from all tables."""
-    tables = ["expenses", "income", "budgets", "savings_goals"]
-    try:
-        cur = conn.cursor()
-        for table in tables:
-            cur.execute(f"DELETE FROM {table}")
-        conn.commit()
-        print("Database has been reset.")
-    except Error as e:
-        print(f"Error resetting database: {e}")
-
-
-# --- Expense Functions ---
-def add_expense(conn, expense):
-    sql = ''' INSERT INTO expenses(amount,category,date,time) VALUES(?,?,?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, expense)
-    conn.commit()
-    return cur.lastrowid
-
-def get_all_expenses(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT amount, date, time, category FROM expenses ORDER BY date DESC")
-    return cur.fetchall()
-
-def get_total_expenses(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT SUM(amount) FROM expenses")
-    total = cur.fetchone()[0]
-    return total if total else 0
-
-# --- Income Functions ---
-def add_income(conn, income_record):
-    sql = ''' INSERT INTO income(amount,source,date,notes) VALUES(?,?,?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, income_record)
-    conn.commit()
-    return cur.lastrowid
-
-def get_all_income(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT date, source, amount, notes FROM income ORDER BY date DESC")
-    return cur.fetchall()
-    
-def get_latest_income(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT date, source, amount FROM income ORDER BY id DESC LIMIT 1")
-    return cur.fetchone()
-
-def get_total_income(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT SUM(amount) FROM income")
-    total = cur.fetchone()[0]
-    return total if total else 0
-
-# --- Budget Functions ---
-def add_budget(conn, budget):
-    sql = ''' INSERT INTO budgets(name, amount, date) VALUES(?,?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, budget)
-    conn.commit()
-    return cur.lastrowid
-
-def get_all_budgets(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT name, amount FROM budgets ORDER BY date DESC")
-    return cur.fetchall()
-
-# --- Savings Functions ---
-def add_saving_goal(conn, goal):
-    sql = ''' INSERT INTO savings_goals(goal, date) VALUES(?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, goal)
-    conn.commit()
-    return cur.lastrowid
-
-def get_all_savings_goals(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT goal, date FROM savings_goals ORDER BY date DESC")
-    return cur.fetchall()
-
-# --- History Function ---
-def get_all_transactions(conn):
-    """Gets a combined list of income and expenses for the history page."""
-    sql = """
-        SELECT date, source AS description, amount, 'Income' AS type FROM income
-        UNION ALL
-        SELECT date, category AS description, amount, 'Expense' AS type FROM expenses
-        ORDER BY date DESC
-    """
-    cur = conn.cursor()
-    cur.execute(sql)
-    return cur.fetchall()
-
-# Add this function to your existing database.py
-
-def delete_all_records(conn):
-    """Delete all records from all tables."""
-    tables = ['expenses', 'income', 'budgets', 'savings_goals']
-    sql = "DELETE FROM {}"
-    try:
-        cur = conn.cursor()
-        for table in tables:
-            cur.execute(sql.format(table))
-        conn.commit()
-        print("All records have been deleted.")
-    except Error as e:
-        print(f"Error while deleting records: {e}")
-        
-
-# Add this function to your existing database.py
-
-def get_expenses_by_category(conn):
-    """Query expenses and group them by category for the pie chart."""
-    sql = "SELECT category, SUM(amount) FROM expenses GROUP BY category"
-    try:
-        cur = conn.cursor()
-        cur.execute(sql)
-        return cur.fetchall()
-    except Exception as e:
-        print(f"Error fetching expenses by category: {e}")
-        return []
-    
-    # Add these two functions to your existing database.py
-
-def get_recent_expenses(conn, limit=2):
-    """Fetch the most recent expenses."""
-    sql = "SELECT category, amount FROM expenses ORDER BY id DESC LIMIT ?"
-    try:
-        cur = conn.cursor()
-        cur.execute(sql, (limit,))
-        return cur.fetchall()
-    except Exception as e:
-        print(f"Error fetching recent expenses: {e}")
-        return []
-
-def get_recent_savings(conn, limit=2):
-    """Fetch the most recent savings goals."""
-    sql = "SELECT goal FROM savings_goals ORDER BY id DESC LIMIT ?"
-    try:
-        cur = conn.cursor()
-        cur.execute(sql, (limit,))
-        return cur.fetchall()
-    except Exception as e:
-        print(f"Error fetching recent savings: {e}")
-        return []
-    
-    # Add this function to your existing database.py
-
-def get_top_expenses(conn, limit=5):
-    """Fetches the top N expenses by amount."""
-    sql = "SELECT category, SUM(amount) FROM expenses GROUP BY category ORDER BY SUM(amount) DESC LIMIT ?"
-    try:
-        cur = conn.cursor()
-        cur.execute(sql, (limit,))
-        return cur.fetchall()
-    except Exception as e:
-        print(f"Error fetching top expenses: {e}")
-        return []
-    
\ No newline at end of file
+import heapq
+import sqlite3
+from collections import namedtuple
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from itertools import islice, zip_longest
+from sqlite3 import Error
+
+from callbacks import call_isolated
+from money import Money
+from rows import (Budget, CategoryTotal, Expense, Income, LatestIncome, RecentExpense,
+                  RecentGoal, RollupRow, RollupTotal, SavingsGoal, Transaction, row_factory)
+
+DB_FILE = 'budget.db'
+
+
+@dataclass(frozen=True)
+class ConnectionConfig:
+    """PRAGMA settings applied to every new connection."""
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    cache_size: int = -16000        # negative = KiB, positive = pages
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = 'MEMORY'
+    busy_timeout: int = 5000        # milliseconds
+
+    def with_overrides(self, **changes):
+        """Return a copy of this config with some fields replaced."""
+        return replace(self, **changes)
+
+
+PRESETS = {
+    # Interactive use: WAL lets the UI read while a write commits, and
+    # NORMAL only fsyncs at checkpoints, which is still crash-safe in WAL.
+    'desktop-safe': ConnectionConfig(),
+    # Every commit is fsynced; for users who would rather be slow than lose
+    # the last transaction on power failure.
+    'durable': ConnectionConfig(synchronous='FULL'),
+    # Large one-off imports: no fsyncs and a big page cache. A crash during
+    # the import can lose it, so only use this for data that can be re-run.
+    'bulk-ingest': ConnectionConfig(synchronous='OFF',
+                                    cache_size=-262144,
+                                    mmap_size=256 * 1024 * 1024,
+                                    busy_timeout=30000),
+}
+
+_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+_SYNCHRONOUS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+_TEMP_STORE = {'DEFAULT', 'FILE', 'MEMORY'}
+
+
+def get_config(config):
+    """Resolve a preset name or ConnectionConfig into a ConnectionConfig."""
+    if config is None:
+        return PRESETS['desktop-safe']
+    if isinstance(config, ConnectionConfig):
+        return config
+    try:
+        return PRESETS[config]
+    except KeyError:
+        raise ValueError(f"Unknown connection preset: {config!r}") from None
+
+
+def apply_config(conn, config):
+    """Apply the PRAGMAs of a ConnectionConfig to an open connection."""
+    config = get_config(config)
+    journal_mode = config.journal_mode.upper()
+    synchronous = config.synchronous.upper()
+    temp_store = config.temp_store.upper()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"Invalid journal_mode: {config.journal_mode!r}")
+    if synchronous not in _SYNCHRONOUS:
+        raise ValueError(f"Invalid synchronous level: {config.synchronous!r}")
+    if temp_store not in _TEMP_STORE:
+        raise ValueError(f"Invalid temp_store: {config.temp_store!r}")
+    cur = conn.cursor()
+    # busy_timeout goes first so that switching journal mode can wait for locks.
+    cur.execute(f"PRAGMA busy_timeout = {int(config.busy_timeout)}")
+    cur.execute(f"PRAGMA journal_mode = {journal_mode}")
+    cur.execute(f"PRAGMA synchronous = {synchronous}")
+    cur.execute(f"PRAGMA cache_size = {int(config.cache_size)}")
+    cur.execute(f"PRAGMA mmap_size = {int(config.mmap_size)}")
+    cur.execute(f"PRAGMA temp_store = {temp_store}")
+
+
+def create_connection(db_file=DB_FILE, config='desktop-safe'):
+    """Create a database connection to the SQLite database.
+
+    `config` is either a preset name from PRESETS or a ConnectionConfig.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(db_file)
+        apply_config(conn, config)
+        return conn
+    except Error as e:
+        print(e)
+    return conn
+
+def create_all_tables(conn):
+    """Create all necessary tables if they don't exist, then migrate() them."""
+    sql_statements = [
+        """ CREATE TABLE IF NOT EXISTS expenses (
+                id integer PRIMARY KEY,
+                amount real NOT NULL,
+                category text NOT NULL,
+                date text NOT NULL,
+                time text NOT NULL
+            ); """,
+        """ CREATE TABLE IF NOT EXISTS income (
+                id integer PRIMARY KEY,
+                amount real NOT NULL,
+                source text NOT NULL,
+                date text NOT NULL,
+                notes text
+            ); """,
+        """ CREATE TABLE IF NOT EXISTS budgets (
+                id integer PRIMARY KEY,
+                name text NOT NULL,
+                amount real NOT NULL,
+                date text NOT NULL
+            ); """,
+        """ CREATE TABLE IF NOT EXISTS savings_goals (
+                id integer PRIMARY KEY,
+                goal text NOT NULL,
+                date text NOT NULL
+            ); """
+    ]
+    try:
+        c = conn.cursor()
+        for statement in sql_statements:
+            c.execute(statement)
+    except Error as e:
+        print(e)
+    migrate(conn)
+
+
+# --- Name Dictionaries ---
+# Expense categories and income sources are stored once each in a dictionary
+# table and referenced by integer id. Names are unique ignoring ASCII case
+# (COLLATE NOCASE), so 'Food' and 'food' are the same category. The readers
+# join the names back in; the writers take names and look the ids up.
+# The name is the second field of an expense or income row.
+# base table -> (dictionary table, id column in the base table)
+DICTIONARIES = {
+    'expenses': ('categories', 'category_id'),
+    'income': ('sources', 'source_id'),
+}
+
+
+# --- Rollup Tables ---
+# (table, grain) -> (rollup table, grouping column, bucket expression).
+# Buckets are the 'yyyy-MM-dd' date itself or its 'yyyy-MM' prefix.
+ROLLUPS = {
+    ('expenses', 'day'): ('expenses_rollup_day', 'category_id', '{row}.date'),
+    ('expenses', 'month'): ('expenses_rollup_month', 'category_id', 'substr({row}.date, 1, 7)'),
+    ('income', 'day'): ('income_rollup_day', 'source_id', '{row}.date'),
+    ('income', 'month'): ('income_rollup_month', 'source_id', 'substr({row}.date, 1, 7)'),
+}
+
+
+# --- Search Indexes ---
+# base table -> (FTS5 table, indexed columns, SELECT of rowid + those columns).
+# Each FTS row shares its rowid with the base row it indexes. Category and
+# source names are indexed once each, in their dictionaries, and matched
+# back to the ledger rows through idx_expenses_category and idx_income_source.
+SEARCH_INDEXES = {
+    'categories': ('categories_fts', ('name',), "SELECT id, name FROM categories"),
+    'sources': ('sources_fts', ('name',), "SELECT id, name FROM sources"),
+    'income': ('income_fts', ('notes',), "SELECT id, notes FROM income"),
+    'budgets': ('budgets_fts', ('name',), "SELECT id, name FROM budgets"),
+    'savings_goals': ('savings_goals_fts', ('goal',), "SELECT id, goal FROM savings_goals"),
+}
+
+
+# --- Schema Migrations ---
+# Each migration upgrades the schema by one version and runs in its own
+# transaction together with the PRAGMA user_version bump, so an interrupted
+# upgrade leaves the database at the last complete version. Never edit a
+# migration that has shipped; append a new one instead.
+
+# ROLLUPS and SEARCH_INDEXES as they were when v5 and v7 shipped, before
+# categories and sources moved into dictionary tables in v8, and the
+# expenses and income search indexes as v8 left them, until v10.
+_V5_ROLLUPS = {
+    ('expenses', 'day'): ('expenses_rollup_day', 'category', '{row}.date'),
+    ('expenses', 'month'): ('expenses_rollup_month', 'category', 'substr({row}.date, 1, 7)'),
+    ('income', 'day'): ('income_rollup_day', 'source', '{row}.date'),
+    ('income', 'month'): ('income_rollup_month', 'source', 'substr({row}.date, 1, 7)'),
+}
+_V7_SEARCH_INDEXES = {
+    'expenses': ('expenses_fts', ('category',)),
+    'income': ('income_fts', ('source', 'notes')),
+    'budgets': ('budgets_fts', ('name',)),
+    'savings_goals': ('savings_goals_fts', ('goal',)),
+}
+_V8_SEARCH_INDEXES = {
+    'expenses': ('expenses_fts', ('category',),
+                 "SELECT e.id, c.name FROM expenses e "
+                 "JOIN categories c ON c.id = e.category_id"),
+    'income': ('income_fts', ('source', 'notes'),
+               "SELECT i.id, s.name, i.notes FROM income i "
+               "JOIN sources s ON s.id = i.source_id"),
+}
+
+def _migrate_v1_indexes(cur):
+    """Covering indexes for the date-ordered readers and category grouping."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date "
+                "ON expenses(date, amount, time, category)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category "
+                "ON expenses(category, amount)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_income_date "
+                "ON income(date, source, amount, notes)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_budgets_date "
+                "ON budgets(date, name, amount)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_savings_goals_date "
+                "ON savings_goals(date, goal)")
+
+
+def _migrate_v2_keyset_indexes(cur):
+    """Put id right after date so (date, id) keyset pages are index range scans."""
+    cur.execute("DROP INDEX IF EXISTS idx_expenses_date")
+    cur.execute("DROP INDEX IF EXISTS idx_income_date")
+    cur.execute("CREATE INDEX idx_expenses_date "
+                "ON expenses(date, id, amount, time, category)")
+    cur.execute("CREATE INDEX idx_income_date "
+                "ON income(date, id, source, amount, notes)")
+
+
+def _create_totals_triggers(cur, table):
+    # Snap back to exactly 0 when the last row goes, so float rounding
+    # from many add/subtract cycles cannot leave a residue on an empty table.
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{table}_totals_insert
+                    AFTER INSERT ON {table}
+                    BEGIN
+                        UPDATE ledger_totals SET amount = amount + new.amount,
+                                                 row_count = row_count + 1
+                        WHERE name = '{table}';
+                    END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{table}_totals_update
+                    AFTER UPDATE OF amount ON {table}
+                    BEGIN
+                        UPDATE ledger_totals SET amount = amount - old.amount + new.amount
+                        WHERE name = '{table}';
+                    END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{table}_totals_delete
+                    AFTER DELETE ON {table}
+                    BEGIN
+                        UPDATE ledger_totals SET amount = CASE WHEN row_count = 1 THEN 0
+                                                               ELSE amount - old.amount END,
+                                                 row_count = row_count - 1
+                        WHERE name = '{table}';
+                    END """)
+
+
+def _migrate_v3_ledger_totals(cur):
+    """Running income/expense totals kept exact by triggers."""
+    cur.execute(""" CREATE TABLE IF NOT EXISTS ledger_totals (
+                        name text PRIMARY KEY,
+                        amount real NOT NULL DEFAULT 0,
+                        row_count integer NOT NULL DEFAULT 0
+                    ) WITHOUT ROWID """)
+    for table in ('income', 'expenses'):
+        _create_totals_triggers(cur, table)
+    _rebuild_totals(cur)
+
+
+def _create_category_totals_triggers(cur, column='category_id'):
+    # column keys expense_category_totals and names the category in expenses:
+    # 'category' until v8 moved the names into the categories table.
+    # min/max only need a lookup in idx_expenses_category when the row that
+    # went away was the current extreme of its category.
+    remove_old = f"""
+        UPDATE expense_category_totals
+        SET row_count = row_count - 1,
+            total = CASE WHEN row_count = 1 THEN 0 ELSE total - old.amount END,
+            min_amount = CASE WHEN old.amount > min_amount THEN min_amount
+                              ELSE COALESCE((SELECT MIN(amount) FROM expenses
+                                             WHERE {column} = old.{column}), 0) END,
+            max_amount = CASE WHEN old.amount < max_amount THEN max_amount
+                              ELSE COALESCE((SELECT MAX(amount) FROM expenses
+                                             WHERE {column} = old.{column}), 0) END
+        WHERE {column} = old.{column};
+        DELETE FROM expense_category_totals
+        WHERE {column} = old.{column} AND row_count = 0;
+    """
+    add_new = f"""
+        INSERT INTO expense_category_totals({column}, row_count, total, min_amount, max_amount)
+        VALUES (new.{column}, 1, new.amount, new.amount, new.amount)
+        ON CONFLICT({column}) DO UPDATE
+        SET row_count = row_count + 1,
+            total = total + excluded.total,
+            min_amount = MIN(min_amount, excluded.min_amount),
+            max_amount = MAX(max_amount, excluded.max_amount);
+    """
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_expenses_category_insert
+                     AFTER INSERT ON expenses
+                     BEGIN {add_new} END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_expenses_category_update
+                     AFTER UPDATE OF amount, {column} ON expenses
+                     BEGIN {remove_old} {add_new} END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_expenses_category_delete
+                     AFTER DELETE ON expenses
+                     BEGIN {remove_old} END """)
+
+
+def _migrate_v4_expense_category_totals(cur):
+    """Per-category count/sum/min/max of expenses kept current by triggers."""
+    cur.execute(""" CREATE TABLE IF NOT EXISTS expense_category_totals (
+                        category text PRIMARY KEY,
+                        row_count integer NOT NULL,
+                        total real NOT NULL,
+                        min_amount real NOT NULL,
+                        max_amount real NOT NULL
+                    ) WITHOUT ROWID """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expense_category_totals_total "
+                "ON expense_category_totals(total)")
+    _create_category_totals_triggers(cur, 'category')
+    cur.execute(""" INSERT INTO expense_category_totals
+                        (category, row_count, total, min_amount, max_amount)
+                    SELECT category, COUNT(*), SUM(amount), MIN(amount), MAX(amount)
+                    FROM expenses GROUP BY category """)
+
+
+def _create_rollup_triggers(cur, table, rollup, column, bucket):
+    remove_old = f"""
+        UPDATE {rollup}
+        SET row_count = row_count - 1,
+            total = CASE WHEN row_count = 1 THEN 0 ELSE total - old.amount END
+        WHERE bucket = {bucket.format(row='old')} AND {column} = old.{column};
+        DELETE FROM {rollup}
+        WHERE bucket = {bucket.format(row='old')} AND {column} = old.{column}
+              AND row_count = 0;
+    """
+    add_new = f"""
+        INSERT INTO {rollup}(bucket, {column}, row_count, total)
+        VALUES ({bucket.format(row='new')}, new.{column}, 1, new.amount)
+        ON CONFLICT(bucket, {column}) DO UPDATE
+        SET row_count = row_count + 1, total = total + excluded.total;
+    """
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{rollup}_insert
+                     AFTER INSERT ON {table}
+                     BEGIN {add_new} END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{rollup}_update
+                     AFTER UPDATE OF amount, date, {column} ON {table}
+                     BEGIN {remove_old} {add_new} END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{rollup}_delete
+                     AFTER DELETE ON {table}
+                     BEGIN {remove_old} END """)
+
+
+def _migrate_v5_rollups(cur):
+    """Day and month rollups of expenses by category and income by source."""
+    for (table, grain), (rollup, column, bucket) in _V5_ROLLUPS.items():
+        cur.execute(f""" CREATE TABLE IF NOT EXISTS {rollup} (
+                            bucket text NOT NULL,
+                            {column} text NOT NULL,
+                            row_count integer NOT NULL,
+                            total real NOT NULL,
+                            PRIMARY KEY (bucket, {column})
+                        ) WITHOUT ROWID """)
+        _create_rollup_triggers(cur, table, rollup, column, bucket)
+        cur.execute(f"DELETE FROM {rollup}")
+        cur.execute(f""" INSERT INTO {rollup}(bucket, {column}, row_count, total)
+                         SELECT {bucket.format(row=table)}, {column}, COUNT(*), SUM(amount)
+                         FROM {table} GROUP BY 1, 2 """)
+
+
+def _create_change_triggers(cur, table):
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_{event.lower()}
+                         AFTER {event} ON {table}
+                         BEGIN
+                             UPDATE change_counters SET changes = changes + 1
+                             WHERE name = '{table}';
+                         END """)
+
+
+def _migrate_v6_change_counters(cur):
+    """Per-table row-change counters that other processes can poll."""
+    cur.execute(""" CREATE TABLE IF NOT EXISTS change_counters (
+                        name text PRIMARY KEY,
+                        changes integer NOT NULL DEFAULT 0
+                    ) WITHOUT ROWID """)
+    for table in ('expenses', 'income', 'budgets', 'savings_goals'):
+        cur.execute("INSERT OR IGNORE INTO change_counters(name) VALUES (?)", (table,))
+        _create_change_triggers(cur, table)
+
+
+def _create_search_triggers(cur, table, fts, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert
+                     AFTER INSERT ON {table}
+                     BEGIN
+                         INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});
+                     END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{fts}_update
+                     AFTER UPDATE OF {column_list} ON {table}
+                     BEGIN
+                         UPDATE {fts} SET ({column_list}) = ({new_values}) WHERE rowid = new.id;
+                     END """)
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete
+                     AFTER DELETE ON {table}
+                     BEGIN
+                         DELETE FROM {fts} WHERE rowid = old.id;
+                     END """)
+
+
+def _migrate_v7_search_index(cur):
+    """FTS5 indexes over the free-text columns, kept in sync by triggers."""
+    for table, (fts, columns) in _V7_SEARCH_INDEXES.items():
+        column_list = ', '.join(columns)
+        cur.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+                    f"USING fts5({column_list}, prefix='2 3')")
+        _create_search_triggers(cur, table, fts, columns)
+        cur.execute(f"DELETE FROM {fts}")
+        cur.execute(f"INSERT INTO {fts}(rowid, {column_list}) "
+                    f"SELECT id, {column_list} FROM {table}")
+
+
+def _create_rename_trigger(cur, table, dictionary):
+    # A rename touches no base row, so bump the base table's change counter
+    # here for the pollers that read change_counters.
+    cur.execute(f""" CREATE TRIGGER IF NOT EXISTS trg_{dictionary}_rename
+                     AFTER UPDATE OF name ON {dictionary}
+                     BEGIN
+                         UPDATE change_counters SET changes = changes + 1
+                         WHERE name = '{table}';
+                     END """)
+
+
+# Indexes behind the sortable columns of TABLE_VIEWS, as name: (table,
+# columns). Each ends in the row's id in the view, so a sort and its ties
+# are one index range scan; the 'transactions' arms order by their
+# transaction_id() expressions, so they need indexes of their own.
+VIEW_SORT_INDEXES = {
+    'idx_expenses_amount': ('expenses', 'amount, id'),
+    'idx_expenses_time': ('expenses', 'time, id'),
+    'idx_expenses_category_id': ('expenses', 'category_id, id'),
+    'idx_expenses_transactions_date': ('expenses', 'date, id * 2 + 1'),
+    'idx_expenses_transactions_amount': ('expenses', 'amount, id * 2 + 1'),
+    'idx_expenses_transactions_category': ('expenses', 'category_id, id * 2 + 1'),
+    'idx_income_source_id': ('income', 'source_id, id'),
+    'idx_income_amount': ('income', 'amount, id'),
+    'idx_income_notes': ('income', "COALESCE(notes, ''), id"),
+    'idx_income_transactions_date': ('income', 'date, id * 2'),
+    'idx_income_transactions_amount': ('income', 'amount, id * 2'),
+    'idx_income_transactions_source': ('income', 'source_id, id * 2'),
+    'idx_budgets_date': ('budgets', 'date, id, name, amount'),
+    'idx_budgets_name': ('budgets', 'name, id'),
+    'idx_budgets_amount': ('budgets', 'amount, id'),
+    'idx_savings_goals_date': ('savings_goals', 'date, id, goal'),
+    'idx_savings_goals_goal': ('savings_goals', 'goal, id'),
+}
+
+
+def _create_view_sort_indexes(cur, tables):
+    for name, (table, columns) in VIEW_SORT_INDEXES.items():
+        if table in tables:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+
+
+def _create_ledger_objects(cur):
+    """Indexes and triggers of the dictionary-keyed expenses and income tables.
+
+    Dropping a table drops its indexes and triggers with it, so this runs
+    again whenever a migration rebuilds expenses or income.
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date "
+                "ON expenses(date, id, amount, time, category_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category "
+                "ON expenses(category_id, amount)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_income_date "
+                "ON income(date, id, source_id, amount, notes)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_income_source "
+                "ON income(source_id, amount)")
+    _create_view_sort_indexes(cur, ('expenses', 'income'))
+    for table in ('income', 'expenses'):
+        _create_totals_triggers(cur, table)
+        _create_change_triggers(cur, table)
+    _create_category_totals_triggers(cur)
+    for (table, grain), (rollup, column, bucket) in ROLLUPS.items():
+        _create_rollup_triggers(cur, table, rollup, column, bucket)
+    _create_search_triggers(cur, 'income', 'income_fts', ('notes',))
+    for table, (dictionary, _) in DICTIONARIES.items():
+        _create_rename_trigger(cur, table, dictionary)
+
+
+def _migrate_v8_name_dictionaries(cur):
+    """Move expense categories and income sources into dictionary tables."""
+    for dictionary in ('categories', 'sources'):
+        cur.execute(f""" CREATE TABLE IF NOT EXISTS {dictionary} (
+                            id integer PRIMARY KEY,
+                            name text NOT NULL UNIQUE COLLATE NOCASE
+                        ) """)
+    # Names that differ only in case collapse into the spelling seen first.
+    cur.execute("INSERT OR IGNORE INTO categories(name) SELECT category FROM expenses ORDER BY id")
+    cur.execute("INSERT OR IGNORE INTO sources(name) SELECT source FROM income ORDER BY id")
+
+    cur.execute(""" CREATE TABLE expenses_v8 (
+                        id integer PRIMARY KEY,
+                        amount real NOT NULL,
+                        category_id integer NOT NULL REFERENCES categories(id),
+                        date text NOT NULL,
+                        time text NOT NULL
+                    ) """)
+    cur.execute(""" INSERT INTO expenses_v8(id, amount, category_id, date, time)
+                    SELECT e.id, e.amount, c.id, e.date, e.time
+                    FROM expenses e JOIN categories c ON c.name = e.category """)
+    cur.execute(""" CREATE TABLE income_v8 (
+                        id integer PRIMARY KEY,
+                        amount real NOT NULL,
+                        source_id integer NOT NULL REFERENCES sources(id),
+                        date text NOT NULL,
+                        notes text
+                    ) """)
+    cur.execute(""" INSERT INTO income_v8(id, amount, source_id, date, notes)
+                    SELECT i.id, i.amount, s.id, i.date, i.notes
+                    FROM income i JOIN sources s ON s.name = i.source """)
+    for table in ('expenses', 'income'):
+        cur.execute(f"DROP TABLE {table}")
+        cur.execute(f"ALTER TABLE {table}_v8 RENAME TO {table}")
+
+    # The derived tables were keyed by name; key them by id instead.
+    cur.execute("DROP TABLE expense_category_totals")
+    cur.execute(""" CREATE TABLE expense_category_totals (
+                        category_id integer PRIMARY KEY REFERENCES categories(id),
+                        row_count integer NOT NULL,
+                        total real NOT NULL,
+                        min_amount real NOT NULL,
+                        max_amount real NOT NULL
+                    ) """)
+    cur.execute("CREATE INDEX idx_expense_category_totals_total "
+                "ON expense_category_totals(total)")
+    for (table, grain), (rollup, column, bucket) in ROLLUPS.items():
+        cur.execute(f"DROP TABLE {rollup}")
+        cur.execute(f""" CREATE TABLE {rollup} (
+                            bucket text NOT NULL,
+                            {column} integer NOT NULL,
+                            row_count integer NOT NULL,
+                            total real NOT NULL,
+                            PRIMARY KEY (bucket, {column})
+                        ) WITHOUT ROWID """)
+
+    _create_ledger_objects(cur)
+    _rebuild_totals(cur)
+    _rebuild_category_totals(cur)
+    _rebuild_rollups(cur)
+    for fts, columns, select in _V8_SEARCH_INDEXES.values():
+        cur.execute(f"DELETE FROM {fts}")
+        cur.execute(f"INSERT INTO {fts}(rowid, {', '.join(columns)}) {select}")
+
+
+def _migrate_v9_integer_cents(cur):
+    """Store amounts as integer centavos instead of floating-point pesos.
+
+    Every table holding an amount or a sum of amounts is rebuilt with
+    integer columns; a REAL column would turn the integers back into floats.
+    """
+    cents = "CAST(ROUND(amount * 100) AS INTEGER)"
+    # These name expenses and income, which cannot be renamed back into
+    # place while a trigger on another table refers to them.
+    for dictionary in ('categories', 'sources'):
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{dictionary}_rename")
+
+    cur.execute(""" CREATE TABLE expenses_v9 (
+                        id integer PRIMARY KEY,
+                        amount integer NOT NULL,
+                        category_id integer NOT NULL REFERENCES categories(id),
+                        date text NOT NULL,
+                        time text NOT NULL
+                    ) """)
+    cur.execute(f""" INSERT INTO expenses_v9(id, amount, category_id, date, time)
+                     SELECT id, {cents}, category_id, date, time FROM expenses """)
+    cur.execute(""" CREATE TABLE income_v9 (
+                        id integer PRIMARY KEY,
+                        amount integer NOT NULL,
+                        source_id integer NOT NULL REFERENCES sources(id),
+                        date text NOT NULL,
+                        notes text
+                    ) """)
+    cur.execute(f""" INSERT INTO income_v9(id, amount, source_id, date, notes)
+                     SELECT id, {cents}, source_id, date, notes FROM income """)
+    cur.execute(""" CREATE TABLE budgets_v9 (
+                        id integer PRIMARY KEY,
+                        name text NOT NULL,
+                        amount integer NOT NULL,
+                        date text NOT NULL
+                    ) """)
+    cur.execute(f""" INSERT INTO budgets_v9(id, name, amount, date)
+                     SELECT id, name, {cents}, date FROM budgets """)
+    for table in ('expenses', 'income', 'budgets'):
+        cur.execute(f"DROP TABLE {table}")
+        cur.execute(f"ALTER TABLE {table}_v9 RENAME TO {table}")
+
+    cur.execute("DROP TABLE ledger_totals")
+    cur.execute(""" CREATE TABLE ledger_totals (
+                        name text PRIMARY KEY,
+                        amount integer NOT NULL DEFAULT 0,
+                        row_count integer NOT NULL DEFAULT 0
+                    ) WITHOUT ROWID """)
+    cur.execute("DROP TABLE expense_category_totals")
+    cur.execute(""" CREATE TABLE expense_category_totals (
+                        category_id integer PRIMARY KEY REFERENCES categories(id),
+                        row_count integer NOT NULL,
+                        total integer NOT NULL,
+                        min_amount integer NOT NULL,
+                        max_amount integer NOT NULL
+                    ) """)
+    cur.execute("CREATE INDEX idx_expense_category_totals_total "
+                "ON expense_category_totals(total)")
+    for (table, grain), (rollup, column, bucket) in ROLLUPS.items():
+        cur.execute(f"DROP TABLE {rollup}")
+        cur.execute(f""" CREATE TABLE {rollup} (
+                            bucket text NOT NULL,
+                            {column} integer NOT NULL,
+                            row_count integer NOT NULL,
+                            total integer NOT NULL,
+                            PRIMARY KEY (bucket, {column})
+                        ) WITHOUT ROWID """)
+
+    _create_ledger_objects(cur)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_budgets_date "
+                "ON budgets(date, name, amount)")
+    _create_change_triggers(cur, 'budgets')
+    _create_search_triggers(cur, 'budgets', 'budgets_fts', ('name',))
+    _rebuild_totals(cur)
+    _rebuild_category_totals(cur)
+    _rebuild_rollups(cur)
+
+
+def _migrate_v10_dictionary_search(cur):
+    """Search category and source names in the dictionaries, not in every row.
+
+    expenses_fts held a copy of the category name for each expense, so a
+    search for a category ranked every one of its rows. The names are now
+    indexed once in categories_fts and sources_fts, and income_fts keeps
+    only the notes.
+    """
+    for dictionary, _ in DICTIONARIES.values():
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{dictionary}_rename")
+    for fts, _, _ in _V8_SEARCH_INDEXES.values():
+        for event in ('insert', 'update', 'delete'):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_{fts}_{event}")
+        cur.execute(f"DROP TABLE IF EXISTS {fts}")
+    rebuilt = ('categories', 'sources', 'income')
+    for table in rebuilt:
+        fts, columns, _ = SEARCH_INDEXES[table]
+        cur.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, prefix='2 3')")
+    for dictionary, _ in DICTIONARIES.values():
+        _create_search_triggers(cur, dictionary, *SEARCH_INDEXES[dictionary][:2])
+    _create_ledger_objects(cur)
+    _rebuild_search_index(cur, rebuilt)
+
+
+def _migrate_v11_view_sort_indexes(cur):
+    """Index every column the window's tables can be sorted by.
+
+    Sorting a table view by a column without an index scanned the whole
+    table and sorted it in a temp B-tree for every page. The budgets and
+    savings goals date indexes are rebuilt with id after the date.
+    """
+    cur.execute("DROP INDEX IF EXISTS idx_budgets_date")
+    cur.execute("DROP INDEX IF EXISTS idx_savings_goals_date")
+    _create_view_sort_indexes(cur, ('expenses', 'income', 'budgets', 'savings_goals'))
+
+
+MIGRATIONS = [
+    _migrate_v1_indexes,
+    _migrate_v2_keyset_indexes,
+    _migrate_v3_ledger_totals,
+    _migrate_v4_expense_category_totals,
+    _migrate_v5_rollups,
+    _migrate_v6_change_counters,
+    _migrate_v7_search_index,
+    _migrate_v8_name_dictionaries,
+    _migrate_v9_integer_cents,
+    _migrate_v10_dictionary_search,
+    _migrate_v11_view_sort_indexes,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Upgrade the database in place to SCHEMA_VERSION.
+
+    Raises Error if a step fails, leaving the database at the last version
+    that completed.
+    """
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        print(f"Warning: database schema v{version} is newer than this "
+              f"application (v{SCHEMA_VERSION}).")
+        return version
+    cur = conn.cursor()
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        try:
+            with transaction(conn):
+                MIGRATIONS[target - 1](cur)
+                cur.execute(f"PRAGMA user_version = {target}")
+        except Error as e:
+            print(f"Error migrating database to v{target}: {e}")
+            raise
+        version = target
+    return version
+
+
+# --- Query Plans ---
+# The readers below that run on every UI refresh. check_query_plans() makes
+# sure each of them is served from an index without a temporary sort.
+HOT_QUERIES = {
+    'all_expenses': """ SELECT e.amount, e.date, e.time, c.name
+                        FROM expenses e JOIN categories c ON c.id = e.category_id
+                        ORDER BY e.date DESC, e.id DESC """,
+    'all_income': """ SELECT i.date, s.name, i.amount, i.notes
+                      FROM income i JOIN sources s ON s.id = i.source_id
+                      ORDER BY i.date DESC, i.id DESC """,
+    'all_budgets': "SELECT name, amount FROM budgets ORDER BY date DESC",
+    'all_savings_goals': "SELECT goal, date FROM savings_goals ORDER BY date DESC",
+    'all_transactions': """
+        SELECT i.date, s.name AS description, i.amount, 'Income' AS type
+        FROM income i JOIN sources s ON s.id = i.source_id
+        UNION ALL
+        SELECT e.date, c.name AS description, e.amount, 'Expense' AS type
+        FROM expenses e JOIN categories c ON c.id = e.category_id
+        ORDER BY date DESC
+    """,
+    'expenses_by_category': """ SELECT c.name, t.total
+                                FROM categories c JOIN expense_category_totals t
+                                     ON t.category_id = c.id
+                                ORDER BY c.name """,
+    'top_expenses': """ SELECT c.name, t.total
+                        FROM expense_category_totals t JOIN categories c ON c.id = t.category_id
+                        ORDER BY t.total DESC LIMIT ? """,
+    'recent_expenses': """ SELECT c.name, e.amount
+                           FROM expenses e JOIN categories c ON c.id = e.category_id
+                           ORDER BY e.id DESC LIMIT ? """,
+    'recent_savings': "SELECT goal FROM savings_goals ORDER BY id DESC LIMIT ?",
+    'latest_income': """ SELECT i.date, s.name, i.amount
+                         FROM income i JOIN sources s ON s.id = i.source_id
+                         ORDER BY i.id DESC LIMIT 1 """,
+    'ledger_total': "SELECT amount FROM ledger_totals WHERE name = ?",
+}
+
+# Keyset pages: each reader's columns followed by the (date, id) sort key.
+# The paged table is always aliased t so that {where} can refer to it.
+PAGE_QUERIES = {
+    'expenses': "SELECT t.amount, t.date, t.time, c.name, t.date, t.id "
+                "FROM expenses t JOIN categories c ON c.id = t.category_id "
+                "{where} ORDER BY t.date DESC, t.id DESC LIMIT ?",
+    'income': "SELECT t.date, s.name, t.amount, t.notes, t.date, t.id "
+              "FROM income t JOIN sources s ON s.id = t.source_id "
+              "{where} ORDER BY t.date DESC, t.id DESC LIMIT ?",
+    'income_transactions': "SELECT t.date, s.name, t.amount, 'Income', t.date, t.id "
+                           "FROM income t JOIN sources s ON s.id = t.source_id "
+                           "{where} ORDER BY t.date DESC, t.id DESC LIMIT ?",
+    'expense_transactions': "SELECT t.date, c.name, t.amount, 'Expense', t.date, t.id "
+                            "FROM expenses t JOIN categories c ON c.id = t.category_id "
+                            "{where} ORDER BY t.date DESC, t.id DESC LIMIT ?",
+}
+KEYSET_WHERE = "WHERE (t.date, t.id) < (?, ?)"
+for _name, _sql in PAGE_QUERIES.items():
+    HOT_QUERIES[f'{_name}_page'] = _sql.format(where=KEYSET_WHERE)
+
+# --- Row Types ---
+# The rows.py type each reader's rows are built as, by HOT_QUERIES and
+# PAGE_QUERIES name. Page rows carry the same type as the full reader.
+ROW_TYPES = {
+    'all_expenses': Expense,
+    'all_income': Income,
+    'all_budgets': Budget,
+    'all_savings_goals': SavingsGoal,
+    'all_transactions': Transaction,
+    'expenses_by_category': CategoryTotal,
+    'top_expenses': CategoryTotal,
+    'recent_expenses': RecentExpense,
+    'recent_savings': RecentGoal,
+    'latest_income': LatestIncome,
+}
+PAGE_ROW_TYPES = {
+    'expenses': Expense,
+    'income': Income,
+    'income_transactions': Transaction,
+    'expense_transactions': Transaction,
+}
+_row_factory = lru_cache(maxsize=None)(row_factory)
+
+
+def _cursor(conn, row_type, keyed=False):
+    """A cursor that returns its rows as row_type (see rows.row_factory)."""
+    cur = conn.cursor()
+    cur.row_factory = _row_factory(row_type, keyed)
+    return cur
+
+
+def explain_query_plan(conn, sql, params=()):
+    """Return the detail lines of EXPLAIN QUERY PLAN for a statement."""
+    cur = conn.cursor()
+    cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+    return [row[3] for row in cur.fetchall()]
+
+
+def check_query_plans(conn):
+    """Return (name, detail) for every hot query that still sorts in a temp B-tree."""
+    problems = []
+    for name, sql in HOT_QUERIES.items():
+        params = (1,) * sql.count('?')
+        for detail in explain_query_plan(conn, sql, params):
+            if 'TEMP B-TREE' in detail:
+                problems.append((name, detail))
+    return problems
+
+
+# --- Transactions ---
+# Nesting depth of transaction() blocks per open connection, keyed by id().
+# Entries are removed when the outermost block exits.
+_tx_depth = {}
+
+
+def in_transaction_block(conn):
+    """True while conn is inside a transaction() block."""
+    return _tx_depth.get(id(conn), 0) > 0
+
+
+@contextmanager
+def transaction(conn):
+    """Group several writes into one atomic transaction.
+
+    The outermost block issues BEGIN IMMEDIATE and a single COMMIT (or
+    ROLLBACK if the block raises). Nested blocks use SAVEPOINTs, so an
+    exception inside one only undoes that block's writes. The add_* helpers
+    open a block of their own, so inside one they only add a savepoint.
+    """
+    key = id(conn)
+    depth = _tx_depth.get(key, 0)
+    cur = conn.cursor()
+    if depth == 0:
+        if conn.in_transaction:
+            raise Error("transaction() cannot start while the connection "
+                        "has uncommitted changes")
+        cur.execute("BEGIN IMMEDIATE")
+    else:
+        cur.execute(f"SAVEPOINT sp_{depth}")
+    _tx_depth[key] = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+            _notify_changes(conn)
+        else:
+            cur.execute(f"ROLLBACK TO sp_{depth}")
+            cur.execute(f"RELEASE sp_{depth}")
+        raise
+    else:
+        if depth == 0:
+            try:
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                _notify_changes(conn)
+                raise
+            _notify_changes(conn)
+        else:
+            cur.execute(f"RELEASE sp_{depth}")
+    finally:
+        if depth == 0:
+            del _tx_depth[key]
+        else:
+            _tx_depth[key] = depth
+
+
+@contextmanager
+def read_snapshot(conn):
+    """Run several reads against one consistent state of the database.
+
+    Outside a transaction each SELECT sees whatever was committed when it
+    started; inside this block they all see the same commit.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.commit()
+
+
+# --- Change Notification ---
+BASE_TABLES = ('expenses', 'income', 'budgets', 'savings_goals')
+# Listeners are called as listener(tables) with the set of base tables
+# ('expenses', 'income', 'budgets', 'savings_goals') that a commit changed.
+# They run after the commit, on the committing thread, so a reader that
+# reacts to the notification always sees the new data. A rolled-back
+# transaction() notifies too: a reader on the same connection may have seen
+# its uncommitted rows.
+_change_listeners = []
+_pending_changes = {}
+
+
+def add_change_listener(listener):
+    _change_listeners.append(listener)
+
+
+def remove_change_listener(listener):
+    _change_listeners.remove(listener)
+
+
+def _mark_changed(conn, *tables):
+    if tables:
+        _pending_changes.setdefault(id(conn), set()).update(tables)
+
+
+def _notify_changes(conn):
+    tables = _pending_changes.pop(id(conn), None)
+    if tables:
+        tables = frozenset(tables)
+        for listener in list(_change_listeners):
+            call_isolated("in change listener", listener, tables)
+
+
+# --- Clearing ---
+# Every table emptied by a reset: the ledger, the name dictionaries and
+# everything derived from them except ledger_totals, which is zeroed.
+CLEARED_TABLES = (*BASE_TABLES, 'categories', 'sources', 'expense_category_totals',
+                  *(rollup for rollup, _, _ in ROLLUPS.values()),
+                  *(fts for fts, _, _ in SEARCH_INDEXES.values()))
+
+
+def _clear_all(cur):
+    """Empty CLEARED_TABLES by dropping and recreating them.
+
+    A DELETE would fire the totals, category, rollup, search and change
+    triggers once per row; a table recreated from its own sqlite_master
+    entries, indexes and triggers included, starts empty in one step.
+    """
+    tables, others = [], []
+    for table in CLEARED_TABLES:
+        cur.execute("SELECT type, sql FROM sqlite_master "
+                    "WHERE tbl_name = ? AND sql IS NOT NULL", (table,))
+        for kind, sql in cur.fetchall():
+            (tables if kind == 'table' else others).append(sql)
+    for table in CLEARED_TABLES:
+        cur.execute(f"DROP TABLE {table}")
+    for sql in tables + others:
+        cur.execute(sql)
+    _rebuild_totals(cur)
+    # The change triggers went with the rows; count one change per table.
+    cur.executemany("UPDATE change_counters SET changes = changes + 1 WHERE name = ?",
+                    [(table,) for table in BASE_TABLES])
+
+
+def reset_database(conn):
+    """Deletes all records from all tables."""
+    try:
+        with transaction(conn):
+            _clear_all(conn.cursor())
+            _mark_changed(conn, *BASE_TABLES)
+        print("Database has been reset.")
+    except Error as e:
+        print(f"Error resetting database: {e}")
+
+
+# --- Amounts ---
+# Amounts are stored as integer centavos (schema v9). Writers accept them as
+# Money or as pesos in any form Money.of() takes; readers return Money.
+# table -> position of the amount in the rows its add_* functions take.
+AMOUNT_FIELDS = {'expenses': 0, 'income': 0, 'budgets': 1}
+
+
+def _to_cents(amount):
+    return amount.cents if type(amount) is Money else Money.of(amount).cents
+
+
+def _insert_params(cur, table, row, interner=None):
+    """Turn a row as callers pass it into parameters for INSERT_SQL[table]."""
+    column = AMOUNT_FIELDS.get(table)
+    if column is None:
+        return row
+    row = list(row)
+    row[column] = _to_cents(row[column])
+    if interner is not None:
+        row[1] = interner.intern(cur, row[1])
+    return row
+
+
+INSERT_SQL = {
+    'expenses': ''' INSERT INTO expenses(amount,category_id,date,time) VALUES(?,?,?,?) ''',
+    'income': ''' INSERT INTO income(amount,source_id,date,notes) VALUES(?,?,?,?) ''',
+    'budgets': ''' INSERT INTO budgets(name, amount, date) VALUES(?,?,?) ''',
+    'savings_goals': ''' INSERT INTO savings_goals(goal, date) VALUES(?,?) ''',
+}
+
+
+def get_data_version(conn):
+    """PRAGMA data_version: changes whenever another connection commits."""
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def get_change_counters(conn):
+    """{table: number of rows ever inserted, updated or deleted}, from any process."""
+    cur = conn.cursor()
+    cur.execute("SELECT name, changes FROM change_counters")
+    return dict(cur.fetchall())
+
+
+def get_database_file(conn):
+    """Path of the file conn has open; '' for an in-memory database."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def get_max_ids(conn, tables=BASE_TABLES):
+    """{table: largest row id, 0 for an empty table}.
+
+    Row ids only grow, so reads made in the same read_snapshot() saw every
+    row up to these ids and none after them.
+    """
+    cur = conn.cursor()
+    return {table: cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            for table in tables}
+
+
+# --- Column Snapshots ---
+# (id, amount in cents, day number, category/source id) of the rows after a
+# rowid, in rowid order. Day numbers count days since 1970-01-01.
+COLUMN_QUERIES = {
+    'expenses': """ SELECT id, amount, CAST(julianday(date) - 2440587.5 AS INTEGER), category_id
+                    FROM expenses WHERE id > ? ORDER BY id """,
+    'income': """ SELECT id, amount, CAST(julianday(date) - 2440587.5 AS INTEGER), source_id
+                  FROM income WHERE id > ? ORDER BY id """,
+}
+
+
+def get_column_rows(conn, table, after_id=0):
+    """Raw rows of COLUMN_QUERIES[table] with an id greater than after_id."""
+    cur = conn.cursor()
+    cur.execute(COLUMN_QUERIES[table], (after_id,))
+    return cur.fetchall()
+
+
+# --- Search ---
+SearchHit = namedtuple('SearchHit', 'kind id text date amount score')
+
+# (kind, query) pairs, each returning (id, text, date, amount, score) for
+# :query, best first, at most :limit rows. A category or source is matched
+# once in its dictionary; its largest :limit rows follow from a backward
+# scan of idx_expenses_category/idx_income_source.
+SEARCH_QUERIES = (
+    ('expense', """ SELECT e.id, m.name, e.date, e.amount, m.score
+                    FROM (SELECT rowid AS id, name, bm25(categories_fts) AS score
+                          FROM categories_fts WHERE categories_fts MATCH :query
+                          ORDER BY score LIMIT :limit) m
+                    JOIN expenses e ON e.id IN (
+                        SELECT id FROM expenses INDEXED BY idx_expenses_category
+                        WHERE category_id = m.id ORDER BY amount DESC LIMIT :limit)
+                    ORDER BY m.score, e.amount DESC LIMIT :limit """),
+    ('income', """ SELECT i.id, m.name || COALESCE(' - ' || NULLIF(i.notes, ''), ''),
+                          i.date, i.amount, m.score
+                   FROM (SELECT rowid AS id, name, bm25(sources_fts) AS score
+                         FROM sources_fts WHERE sources_fts MATCH :query
+                         ORDER BY score LIMIT :limit) m
+                   JOIN income i ON i.id IN (
+                       SELECT id FROM income INDEXED BY idx_income_source
+                       WHERE source_id = m.id ORDER BY amount DESC LIMIT :limit)
+                   ORDER BY m.score, i.amount DESC LIMIT :limit """),
+    ('income', """ SELECT i.id, s.name || COALESCE(' - ' || NULLIF(i.notes, ''), ''),
+                          i.date, i.amount, bm25(income_fts)
+                   FROM income_fts JOIN income i ON i.id = income_fts.rowid
+                   JOIN sources s ON s.id = i.source_id
+                   WHERE income_fts MATCH :query ORDER BY bm25(income_fts) LIMIT :limit """),
+    ('budget', """ SELECT b.id, b.name, b.date, b.amount, bm25(budgets_fts)
+                   FROM budgets_fts JOIN budgets b ON b.id = budgets_fts.rowid
+                   WHERE budgets_fts MATCH :query ORDER BY bm25(budgets_fts) LIMIT :limit """),
+    ('savings_goal', """ SELECT g.id, g.goal, g.date, NULL, bm25(savings_goals_fts)
+                         FROM savings_goals_fts JOIN savings_goals g ON g.id = savings_goals_fts.rowid
+                         WHERE savings_goals_fts MATCH :query
+                         ORDER BY bm25(savings_goals_fts) LIMIT :limit """),
+)
+
+
+def build_match_query(text):
+    """Turn user input into an FTS5 query.
+
+    "Quoted text" is matched as a phrase; every other word matches as a
+    prefix (groc -> groceries). All parts must match. Returns None when the
+    input has nothing to search for.
+    """
+    parts = []
+    for i, chunk in enumerate(text.split('"')):
+        if i % 2:
+            if chunk.strip():
+                parts.append('"' + chunk.strip() + '"')
+        else:
+            words = (word.strip('*') for word in chunk.split())
+            parts.extend('"' + word + '"*' for word in words if word)
+    return ' '.join(parts) or None
+
+
+def search(conn, text, limit=20):
+    """Full-text search over categories, income sources and notes, budgets and goals.
+
+    Returns up to `limit` SearchHits across all four tables. A hit's score
+    is the bm25 of its own FTS table (lower is better), and scores from
+    different tables do not compare, so each query's hits are ranked on
+    their own and the rankings interleaved: every query's best hit, then
+    every query's second best, and so on.
+    """
+    query = build_match_query(text)
+    if query is None:
+        return []
+    rankings = []
+    cur = conn.cursor()
+    try:
+        for kind, sql in SEARCH_QUERIES:
+            cur.execute(sql, {'query': query, 'limit': limit})
+            rankings.append([SearchHit(kind, row_id, hit_text, date,
+                                       None if amount is None else Money(amount), score)
+                             for row_id, hit_text, date, amount, score in cur.fetchall()])
+    except Error as e:
+        print(f"Error searching for {text!r}: {e}")
+        return []
+    hits, seen = [], set()
+    for rank in zip_longest(*rankings):
+        for hit in rank:
+            # Income can match on its source and on its notes.
+            if hit is not None and (hit.kind, hit.id) not in seen:
+                seen.add((hit.kind, hit.id))
+                hits.append(hit)
+    return hits[:limit]
+
+
+def _rebuild_search_index(cur, tables=tuple(SEARCH_INDEXES)):
+    for table in tables:
+        fts, columns, select = SEARCH_INDEXES[table]
+        cur.execute(f"DELETE FROM {fts}")
+        cur.execute(f"INSERT INTO {fts}(rowid, {', '.join(columns)}) {select}")
+
+
+def rebuild_search_index(conn):
+    """Repopulate every FTS5 table from its base table."""
+    with transaction(conn):
+        _rebuild_search_index(conn.cursor())
+
+
+# --- Running Totals ---
+TOTALS_TABLES = ('income', 'expenses')
+
+
+def _rebuild_totals(cur):
+    for table in TOTALS_TABLES:
+        cur.execute(f""" INSERT OR REPLACE INTO ledger_totals(name, amount, row_count)
+                         SELECT '{table}', COALESCE(SUM(amount), 0), COUNT(*) FROM {table} """)
+
+
+def rebuild_totals(conn):
+    """Recompute ledger_totals from the income and expenses tables."""
+    with transaction(conn):
+        _rebuild_totals(conn.cursor())
+
+
+def verify_totals(conn, tolerance=0):
+    """Return (name, stored, actual) for every running total that has drifted.
+
+    stored and actual are (cents, row_count).
+    """
+    mismatches = []
+    cur = conn.cursor()
+    for table in TOTALS_TABLES:
+        cur.execute(f"SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM {table}")
+        actual = cur.fetchone()
+        cur.execute("SELECT amount, row_count FROM ledger_totals WHERE name = ?", (table,))
+        stored = cur.fetchone()
+        if (stored is None or stored[1] != actual[1]
+                or abs(stored[0] - actual[0]) > tolerance):
+            mismatches.append((table, stored, actual))
+    return mismatches
+
+
+def _get_total(conn, name):
+    cur = conn.cursor()
+    cur.execute(HOT_QUERIES['ledger_total'], (name,))
+    row = cur.fetchone()
+    return Money(row[0]) if row else Money()
+
+
+# --- Category Totals ---
+def _rebuild_category_totals(cur):
+    cur.execute("DELETE FROM expense_category_totals")
+    cur.execute(""" INSERT INTO expense_category_totals
+                        (category_id, row_count, total, min_amount, max_amount)
+                    SELECT category_id, COUNT(*), SUM(amount), MIN(amount), MAX(amount)
+                    FROM expenses GROUP BY category_id """)
+
+
+def rebuild_category_totals(conn):
+    """Recompute expense_category_totals from the expenses table."""
+    with transaction(conn):
+        _rebuild_category_totals(conn.cursor())
+
+
+def check_category_totals(conn, repair=False, tolerance=0):
+    """Compare expense_category_totals with the expenses table.
+
+    Returns (category, stored, actual) for every category that differs,
+    where stored/actual are (count, total, min, max) in cents or None. With
+    repair=True the table is rebuilt when anything differs.
+    """
+    cur = conn.cursor()
+    cur.execute(""" SELECT c.name, COUNT(*), SUM(e.amount), MIN(e.amount), MAX(e.amount)
+                    FROM expenses e JOIN categories c ON c.id = e.category_id
+                    GROUP BY e.category_id """)
+    actual = {row[0]: row[1:] for row in cur.fetchall()}
+    cur.execute(""" SELECT c.name, t.row_count, t.total, t.min_amount, t.max_amount
+                    FROM expense_category_totals t JOIN categories c ON c.id = t.category_id """)
+    stored = {row[0]: row[1:] for row in cur.fetchall()}
+    mismatches = []
+    for category in sorted(actual.keys() | stored.keys()):
+        a, s = actual.get(category), stored.get(category)
+        if a is None or s is None or a[0] != s[0] or any(
+                abs(x - y) > tolerance for x, y in zip(a[1:], s[1:])):
+            mismatches.append((category, s, a))
+    if mismatches and repair:
+        rebuild_category_totals(conn)
+    return mismatches
+
+
+# --- Rollups ---
+def _rebuild_rollups(cur):
+    for (table, grain), (rollup, column, bucket) in ROLLUPS.items():
+        cur.execute(f"DELETE FROM {rollup}")
+        cur.execute(f""" INSERT INTO {rollup}(bucket, {column}, row_count, total)
+                         SELECT {bucket.format(row=table)}, {column}, COUNT(*), SUM(amount)
+                         FROM {table} GROUP BY 1, 2 """)
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup table from the income and expenses tables."""
+    with transaction(conn):
+        _rebuild_rollups(conn.cursor())
+
+
+def get_rollup(conn, table, grain, start=None, end=None, group_by=True):
+    """Time-bucketed totals for 'expenses' or 'income' at 'day' or 'month' grain.
+
+    start and end are inclusive dates ('yyyy-MM-dd'); at month grain they
+    may also be 'yyyy-MM'. With group_by=True rows are
+    (bucket, category_or_source, count, total), otherwise (bucket, count, total),
+    with total as Money (RollupRow / RollupTotal). Rows are ordered by bucket.
+    """
+    try:
+        rollup, column, _ = ROLLUPS[(table, grain)]
+    except KeyError:
+        raise ValueError(f"No rollup for {table!r} at {grain!r} grain") from None
+    dictionary = DICTIONARIES[table][0]
+    width = 10 if grain == 'day' else 7
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("bucket >= ?")
+        params.append(start[:width])
+    if end is not None:
+        conditions.append("bucket <= ?")
+        params.append(end[:width])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    if group_by:
+        row_type = RollupRow
+        sql = (f"SELECT r.bucket, d.name, r.row_count, r.total FROM {rollup} r "
+               f"JOIN {dictionary} d ON d.id = r.{column} "
+               f"{where} ORDER BY r.bucket, d.name")
+    else:
+        row_type = RollupTotal
+        sql = (f"SELECT bucket, SUM(row_count), SUM(total) FROM {rollup} "
+               f"{where} GROUP BY bucket ORDER BY bucket")
+    cur = _cursor(conn, row_type)
+    cur.execute(sql, params)
+    return cur.fetchall()
+
+
+# --- Streaming Readers ---
+FETCH_CHUNK_SIZE = 1000
+
+
+def _iter_rows(conn, query, params=(), chunk_size=FETCH_CHUNK_SIZE):
+    """Yield the rows of a hot query, holding at most chunk_size of them at a time.
+
+    The SELECT stays open until the generator is exhausted or closed, and
+    with it the read snapshot, so consume the rows promptly.
+    """
+    cur = _cursor(conn, ROW_TYPES[query])
+    cur.execute(HOT_QUERIES[query], params)
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cur.close()
+
+
+# --- Categories and Sources ---
+_NOCASE = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def nocase_key(name):
+    """name folded the way COLLATE NOCASE compares it: ASCII letters only."""
+    return name.translate(_NOCASE)
+
+
+class NameInterner:
+    """name -> id cache for one dictionary table, adding names it has not seen.
+
+    Only keep one for the duration of a single write: an id handed out
+    inside a transaction that later rolls back no longer exists.
+    """
+
+    def __init__(self, table):
+        self.dictionary = DICTIONARIES[table][0]
+        self._ids = {}
+
+    def intern(self, cur, name):
+        key = nocase_key(name) if isinstance(name, str) else name
+        name_id = self._ids.get(key)
+        if name_id is None:
+            name_id = _lookup_name(cur, self.dictionary, name)
+            if name_id is None:
+                cur.execute(f"INSERT INTO {self.dictionary}(name) VALUES (?)", (name,))
+                name_id = cur.lastrowid
+            self._ids[key] = name_id
+        return name_id
+
+
+def _lookup_name(cur, table, name):
+    cur.execute(f"SELECT id FROM {table} WHERE name = ?", (name,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _get_names(conn, table):
+    cur = conn.cursor()
+    cur.execute(f"SELECT id, name FROM {table} ORDER BY name")
+    return cur.fetchall()
+
+
+def get_categories(conn):
+    """All expense categories as (id, name), by name."""
+    return _get_names(conn, 'categories')
+
+
+def get_sources(conn):
+    """All income sources as (id, name), by name."""
+    return _get_names(conn, 'sources')
+
+
+def _rename(conn, table, old_name, new_name):
+    dictionary = DICTIONARIES[table][0]
+    cur = conn.cursor()
+    with transaction(conn):
+        _mark_changed(conn, table)
+        cur.execute(f"UPDATE {dictionary} SET name = ? WHERE name = ?", (new_name, old_name))
+    return cur.rowcount > 0
+
+
+def _insert(conn, table, row):
+    """Insert one row, with any new category or source, as a single transaction().
+
+    A failed insert leaves nothing behind, not even the name it added.
+    """
+    cur = conn.cursor()
+    interner = NameInterner(table) if table in DICTIONARIES else None
+    with transaction(conn):
+        _mark_changed(conn, table)
+        cur.execute(INSERT_SQL[table], _insert_params(cur, table, row, interner))
+    return cur.lastrowid
+
+
+def rename_category(conn, old_name, new_name):
+    """Rename an expense category everywhere at once; False if it does not exist.
+
+    Raises sqlite3.IntegrityError if new_name is already another category.
+    """
+    return _rename(conn, 'expenses', old_name, new_name)
+
+
+def rename_source(conn, old_name, new_name):
+    """Rename an income source everywhere at once; False if it does not exist.
+
+    Raises sqlite3.IntegrityError if new_name is already another source.
+    """
+    return _rename(conn, 'income', old_name, new_name)
+
+
+# --- Expense Functions ---
+def add_expense(conn, expense):
+    return _insert(conn, 'expenses', expense)
+
+def get_all_expenses(conn):
+    cur = _cursor(conn, ROW_TYPES['all_expenses'])
+    cur.execute(HOT_QUERIES['all_expenses'])
+    return cur.fetchall()
+
+def iter_expenses(conn, chunk_size=FETCH_CHUNK_SIZE):
+    """Streaming version of get_all_expenses."""
+    return _iter_rows(conn, 'all_expenses', chunk_size=chunk_size)
+
+def get_total_expenses(conn):
+    return _get_total(conn, 'expenses')
+
+# --- Income Functions ---
+def add_income(conn, income_record):
+    return _insert(conn, 'income', income_record)
+
+def get_all_income(conn):
+    cur = _cursor(conn, ROW_TYPES['all_income'])
+    cur.execute(HOT_QUERIES['all_income'])
+    return cur.fetchall()
+
+def iter_income(conn, chunk_size=FETCH_CHUNK_SIZE):
+    """Streaming version of get_all_income."""
+    return _iter_rows(conn, 'all_income', chunk_size=chunk_size)
+    
+def get_latest_income(conn):
+    cur = _cursor(conn, ROW_TYPES['latest_income'])
+    cur.execute(HOT_QUERIES['latest_income'])
+    return cur.fetchone()
+
+def get_total_income(conn):
+    return _get_total(conn, 'income')
+
+# --- Budget Functions ---
+def add_budget(conn, budget):
+    return _insert(conn, 'budgets', budget)
+
+def get_all_budgets(conn):
+    cur = _cursor(conn, ROW_TYPES['all_budgets'])
+    cur.execute(HOT_QUERIES['all_budgets'])
+    return cur.fetchall()
+
+def iter_budgets(conn, chunk_size=FETCH_CHUNK_SIZE):
+    """Streaming version of get_all_budgets."""
+    return _iter_rows(conn, 'all_budgets', chunk_size=chunk_size)
+
+# --- Savings Functions ---
+def add_saving_goal(conn, goal):
+    return _insert(conn, 'savings_goals', goal)
+
+def get_all_savings_goals(conn):
+    cur = _cursor(conn, ROW_TYPES['all_savings_goals'])
+    cur.execute(HOT_QUERIES['all_savings_goals'])
+    return cur.fetchall()
+
+def iter_savings_goals(conn, chunk_size=FETCH_CHUNK_SIZE):
+    """Streaming version of get_all_savings_goals."""
+    return _iter_rows(conn, 'all_savings_goals', chunk_size=chunk_size)
+
+# --- Bulk Insert Functions ---
+BULK_CHUNK_SIZE = 5000
+
+
+@dataclass
+class BulkInsertResult:
+    """Row count and inclusive (first_id, last_id) ranges of a bulk insert."""
+    count: int = 0
+    id_ranges: list = field(default_factory=list)
+
+    def _add_range(self, first_id, last_id):
+        if self.id_ranges and self.id_ranges[-1][1] + 1 == first_id:
+            self.id_ranges[-1] = (self.id_ranges[-1][0], last_id)
+        else:
+            self.id_ranges.append((first_id, last_id))
+        self.count += last_id - first_id + 1
+
+
+def _insert_bulk(conn, table, rows, chunk_size):
+    """Insert rows from any iterable, one executemany and one commit per chunk.
+
+    Chunks that were committed before an error stay in the database; the
+    failing chunk is rolled back and the error is re-raised. Inside a
+    transaction() block each chunk becomes a savepoint instead.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    sql = INSERT_SQL[table]
+    result = BulkInsertResult()
+    rows = iter(rows)
+    cur = conn.cursor()
+    # Repeated categories/sources are looked up once per call, not per row.
+    interner = NameInterner(table) if table in DICTIONARIES else None
+    prepare = table in AMOUNT_FIELDS
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        with transaction(conn):
+            _mark_changed(conn, table)
+            if prepare:
+                chunk = [_insert_params(cur, table, row, interner) for row in chunk]
+            cur.executemany(sql, chunk)
+            # Nobody else can write while we hold the write lock, so the
+            # chunk received consecutive rowids ending at last_insert_rowid().
+            last_id = cur.execute("SELECT last_insert_rowid()").fetchone()[0]
+        result._add_range(last_id - len(chunk) + 1, last_id)
+    return result
+
+
+def add_expenses_bulk(conn, expenses, chunk_size=BULK_CHUNK_SIZE):
+    """Insert (amount, category, date, time) rows from any iterable."""
+    return _insert_bulk(conn, 'expenses', expenses, chunk_size)
+
+
+def add_income_bulk(conn, income_records, chunk_size=BULK_CHUNK_SIZE):
+    """Insert (amount, source, date, notes) rows from any iterable."""
+    return _insert_bulk(conn, 'income', income_records, chunk_size)
+
+
+def add_budgets_bulk(conn, budgets, chunk_size=BULK_CHUNK_SIZE):
+    """Insert (name, amount, date) rows from any iterable."""
+    return _insert_bulk(conn, 'budgets', budgets, chunk_size)
+
+
+def add_saving_goals_bulk(conn, goals, chunk_size=BULK_CHUNK_SIZE):
+    """Insert (goal, date) rows from any iterable."""
+    return _insert_bulk(conn, 'savings_goals', goals, chunk_size)
+
+
+# --- History Function ---
+def get_all_transactions(conn):
+    """Gets a combined list of income and expenses for the history page."""
+    cur = _cursor(conn, ROW_TYPES['all_transactions'])
+    cur.execute(HOT_QUERIES['all_transactions'])
+    return cur.fetchall()
+
+# --- Paginated Readers ---
+# A page is (rows, next_cursor). Rows have the same type as the matching
+# get_all_* reader; pass next_cursor back in to get the following page. It
+# is None once the last page has been returned. Every page is an index range
+# scan, so page N costs the same as page 1.
+DEFAULT_PAGE_SIZE = 200
+
+
+def _fetch_keyset(conn, query, where, params, limit):
+    """(row, (date, id)) pairs of one keyset page."""
+    cur = _cursor(conn, PAGE_ROW_TYPES[query], keyed=True)
+    cur.execute(PAGE_QUERIES[query].format(where=where), (*params, limit))
+    return cur.fetchall()
+
+
+def _get_page(conn, query, cursor, page_size):
+    if cursor is None:
+        rows = _fetch_keyset(conn, query, "", (), page_size + 1)
+    else:
+        rows = _fetch_keyset(conn, query, KEYSET_WHERE, cursor, page_size + 1)
+    if len(rows) <= page_size:
+        return [row for row, _ in rows], None
+    rows = rows[:page_size]
+    return [row for row, _ in rows], rows[-1][1]
+
+
+def get_expenses_page(conn, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Newest-first page of expenses; cursor is a (date, id) pair."""
+    return _get_page(conn, 'expenses', cursor, page_size)
+
+
+def get_income_page(conn, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Newest-first page of income; cursor is a (date, id) pair."""
+    return _get_page(conn, 'income', cursor, page_size)
+
+
+def _transaction_arm_where(kind, cursor):
+    """WHERE clause selecting the rows of one source that sort after cursor.
+
+    History rows are ordered by (date, type, id) descending, and type is
+    constant within a source, so the comparison reduces to date alone or to
+    the (date, id) keyset depending on how the types compare.
+    """
+    date, cursor_kind, row_id = cursor
+    if kind < cursor_kind:
+        return "WHERE t.date <= ?", (date,)
+    if kind == cursor_kind:
+        return KEYSET_WHERE, (date, row_id)
+    return "WHERE t.date < ?", (date,)
+
+
+# --- Table Views ---
+# The rows behind the window's tables (see table_models.py), as raw values:
+# amounts stay integer cents until a cell is drawn. Each view is
+# (SELECT, column kinds, default sort). The kinds are 'money', 'text' or
+# 'name' (text that compares NOCASE), one per column before the row id,
+# which is always selected last; the default sort is (column, descending).
+# No column may be NULL: a keyset cursor on NULL would match nothing.
+TABLE_VIEWS = {
+    'expenses': (""" SELECT t.amount, t.date, t.time, c.name, t.id
+                     FROM expenses t JOIN categories c ON c.id = t.category_id """,
+                 ('money', 'text', 'text', 'name'), (1, True)),
+    'income': (""" SELECT t.date, s.name, t.amount, COALESCE(t.notes, ''), t.id
+                   FROM income t JOIN sources s ON s.id = t.source_id """,
+               ('text', 'name', 'money', 'text'), (0, True)),
+    # Income and expense ids overlap, so the union carries transaction_id()s.
+    'transactions': (""" SELECT s.name, i.amount, i.date, i.id * 2
+                         FROM income i JOIN sources s ON s.id = i.source_id
+                         UNION ALL
+                         SELECT c.name, e.amount, e.date, e.id * 2 + 1
+                         FROM expenses e JOIN categories c ON c.id = e.category_id """,
+                     ('name', 'money', 'text'), (2, True)),
+    # The date is not shown, but budgets are listed by it.
+    'budgets': ("SELECT t.name, t.amount, t.date, t.id FROM budgets t",
+                ('text', 'money', 'text'), (2, True)),
+    'savings_goals': ("SELECT t.goal, t.date, t.id FROM savings_goals t",
+                      ('text', 'text'), (1, True)),
+}
+
+
+def transaction_id(table, row_id):
+    """The id a row of 'income' or 'expenses' has in the 'transactions' view."""
+    return row_id * 2 + (table == 'expenses')
+
+
+def get_table_view_seen(conn, view):
+    """get_max_ids() of the tables behind TABLE_VIEWS[view], as ids in the view."""
+    if view == 'transactions':
+        return {table: transaction_id(table, row_id)
+                for table, row_id in get_max_ids(conn, ('income', 'expenses')).items()}
+    return get_max_ids(conn, (view,))
+
+
+def _table_view_sql(view, column, descending, keyset):
+    """The SELECT of a get_table_view_page() page, after a cursor if keyset."""
+    select, kinds, _ = TABLE_VIEWS[view]
+    direction, after = ('DESC', '<') if descending else ('ASC', '>')
+    # Naming the columns in a CTE lets the keyset condition reach into the
+    # union in 'transactions'; SQLite pushes it down to each arm's index.
+    names = ', '.join(f'c{i}' for i in range(len(kinds)))
+    where = f"WHERE (c{column}, id) {after} (?, ?)" if keyset else ""
+    return (f"WITH v({names}, id) AS ({select}) SELECT * FROM v {where} "
+            f"ORDER BY c{column} {direction}, id {direction} LIMIT ?")
+
+
+# Every sort of every view is a hot query too (see VIEW_SORT_INDEXES).
+for _view, (_, _kinds, _) in TABLE_VIEWS.items():
+    for _column in range(len(_kinds)):
+        for _descending, _direction in ((True, 'desc'), (False, 'asc')):
+            HOT_QUERIES[f'{_view}_view_{_column}_{_direction}'] = \
+                _table_view_sql(_view, _column, _descending, keyset=True)
+
+
+def get_table_view_page(conn, view, sort=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """One keyset page of TABLE_VIEWS[view] as raw rows, the row id last.
+
+    sort is (column, descending) and defaults to the view's own order;
+    rows that tie on the column are ordered by id in the same direction.
+    Returns (rows, next_cursor) like get_expenses_page(); a cursor is the
+    (value, id) of the last row of the previous page.
+    """
+    _, kinds, default = TABLE_VIEWS[view]
+    column, descending = sort or default
+    if not 0 <= column < len(kinds):
+        raise ValueError(f"View {view!r} has no column {column}")
+    cur = conn.cursor()
+    cur.execute(_table_view_sql(view, column, descending, cursor is not None),
+                (*(cursor or ()), page_size + 1))
+    rows = cur.fetchall()
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, (rows[-1][column], rows[-1][-1])
+
+
+# --- Streaming History ---
+# Every history source is a table whose PAGE_QUERIES entry yields Transaction
+# rows plus their (date, id) key, newest first. Adding a source only needs a
+# new entry here, in PAGE_QUERIES and in PAGE_ROW_TYPES.
+TRANSACTION_SOURCES = (
+    ('Income', 'income_transactions'),
+    ('Expense', 'expense_transactions'),
+)
+HISTORY_CHUNK_SIZE = 256
+
+
+def _history_key(item):
+    row, (date, row_id) = item
+    return date, row.type, row_id
+
+
+def _iter_source(conn, kind, query, cursor, chunk_size):
+    """Yield one source's rows newest first, fetched in keyset chunks.
+
+    Each chunk is a separate short query instead of one long-running SELECT,
+    so a paused generator does not pin a read snapshot (and hold back WAL
+    checkpoints) for as long as the caller keeps it around.
+    """
+    if cursor is None:
+        where, params = "", ()
+    else:
+        where, params = _transaction_arm_where(kind, cursor)
+    while True:
+        rows = _fetch_keyset(conn, query, where, params, chunk_size)
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        where, params = KEYSET_WHERE, rows[-1][1]
+
+
+def _iter_history_rows(conn, cursor, chunk_size):
+    sources = [_iter_source(conn, kind, query, cursor, chunk_size)
+               for kind, query in TRANSACTION_SOURCES]
+    return heapq.merge(*sources, key=_history_key, reverse=True)
+
+
+def iter_transactions(conn, cursor=None, chunk_size=HISTORY_CHUNK_SIZE):
+    """Lazily yield the combined history newest first.
+
+    A k-way merge over the date-ordered sources: only about chunk_size rows
+    per source are read ahead of what the caller has consumed. Rows have the
+    shape of get_all_transactions(); cursor resumes after a (date, type, id)
+    position as returned by get_transactions_page().
+    """
+    for row, _ in _iter_history_rows(conn, cursor, chunk_size):
+        yield row
+
+
+def get_transactions_page(conn, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Newest-first page of the combined history; cursor is (date, type, id)."""
+    rows = list(islice(_iter_history_rows(conn, cursor, page_size + 1), page_size + 1))
+    if len(rows) <= page_size:
+        return [row for row, _ in rows], None
+    rows = rows[:page_size]
+    return [row for row, _ in rows], _history_key(rows[-1])
+
+
+def delete_all_records(conn):
+    """Delete all records from all tables.
+
+    Raises Error if the delete fails, leaving every record in place.
+    """
+    try:
+        with transaction(conn):
+            _clear_all(conn.cursor())
+            _mark_changed(conn, *BASE_TABLES)
+        print("All records have been deleted.")
+    except Error as e:
+        print(f"Error while deleting records: {e}")
+        raise
+        
+
+# Add this function to your existing database.py
+
+def get_expenses_by_category(conn):
+    """Query expenses and group them by category for the pie chart."""
+    sql = HOT_QUERIES['expenses_by_category']
+    try:
+        cur = _cursor(conn, ROW_TYPES['expenses_by_category'])
+        cur.execute(sql)
+        return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching expenses by category: {e}")
+        return []
+    
+    # Add these two functions to your existing database.py
+
+def get_recent_expenses(conn, limit=2):
+    """Fetch the most recent expenses."""
+    sql = HOT_QUERIES['recent_expenses']
+    try:
+        cur = _cursor(conn, ROW_TYPES['recent_expenses'])
+        cur.execute(sql, (limit,))
+        return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching recent expenses: {e}")
+        return []
+
+def get_recent_savings(conn, limit=2):
+    """Fetch the most recent savings goals."""
+    sql = HOT_QUERIES['recent_savings']
+    try:
+        cur = _cursor(conn, ROW_TYPES['recent_savings'])
+        cur.execute(sql, (limit,))
+        return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching recent savings: {e}")
+        return []
+    
+    # Add this function to your existing database.py
+
+def get_top_expenses(conn, limit=5):
+    """Fetches the top N expenses by amount."""
+    sql = HOT_QUERIES['top_expenses']
+    try:
+        cur = _cursor(conn, ROW_TYPES['top_expenses'])
+        cur.execute(sql, (limit,))
+        return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching top expenses: {e}")
+        return []
+
+
+# --- Facades ---
+# Every function above that writes. writer.GroupCommitWriter and
+# aio.AsyncDatabase each offer them as methods that run them elsewhere.
+WRITE_FUNCTIONS = (
+    'add_expense', 'add_income', 'add_budget', 'add_saving_goal',
+    'add_expenses_bulk', 'add_income_bulk', 'add_budgets_bulk', 'add_saving_goals_bulk',
+    'delete_all_records', 'reset_database', 'rebuild_totals', 'rebuild_category_totals',
+    'check_category_totals', 'rebuild_rollups', 'rebuild_search_index',
+    'rename_category', 'rename_source',
+)
+
+
+def add_facade_methods(cls, names, runner, doc=None):
+    """Give cls a method for each function of this module in names.
+
+    cls().name(*args, **kwargs) returns self.runner(func, *args, **kwargs),
+    so a facade only defines how it runs a function: on a queue, a thread
+    pool, an event loop. doc is the methods' docstring with {name} filled
+    in, or else the function's own.
+    """
+    for name in names:
+        setattr(cls, name, _facade_method(globals()[name], runner, doc))
+
+
+def _facade_method(func, runner, doc):
+    def method(self, *args, **kwargs):
+        return getattr(self, runner)(func, *args, **kwargs)
+    method.__name__ = method.__qualname__ = func.__name__
+    method.__doc__ = func.__doc__ if doc is None else doc.format(name=func.__name__)
+    return method
@@ -0,0 +1,164 @@
+"""Domain events for the UI, published once a write has committed.
+
+Every entry the window adds is described by one event, and each widget
+subscribes to the events that concern it, so adding an expense touches the
+expense table, the totals and the expense charts and leaves the budget and
+savings pages alone:
+
+    bus = EventBus()
+    bus.subscribe(ExpenseAdded, lambda event: print(event.expense.amount))
+    bus.publish(ExpenseAdded(row_id, Expense(amount, date, time, category)))
+
+LedgerSummary keeps the handful of aggregates the charts and total boxes
+show (totals, per-category totals, the most recent entries) and updates
+them from the events, so redrawing after an insert costs the same no matter
+how many rows the ledger holds.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import ClassVar
+
+import database as db
+from callbacks import call_isolated
+from money import Money
+from rows import Budget, CategoryTotal, Expense, Income, RecentExpense, RecentGoal, SavingsGoal
+
+
+@dataclass(frozen=True)
+class ExpenseAdded:
+    table: ClassVar[str] = 'expenses'
+    row_id: int
+    expense: Expense
+
+
+@dataclass(frozen=True)
+class IncomeAdded:
+    table: ClassVar[str] = 'income'
+    row_id: int
+    income: Income
+
+
+@dataclass(frozen=True)
+class BudgetAdded:
+    table: ClassVar[str] = 'budgets'
+    row_id: int
+    budget: Budget
+    date: str
+
+
+@dataclass(frozen=True)
+class GoalAdded:
+    table: ClassVar[str] = 'savings_goals'
+    row_id: int
+    goal: SavingsGoal
+
+
+@dataclass(frozen=True)
+class DataCleared:
+    """Every record was deleted."""
+
+
+class EventBus:
+    """Calls the handlers subscribed to an event's type, in subscription order."""
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, event_type, handler):
+        self._subscribers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        self._subscribers.get(event_type, []).remove(handler)
+
+    def publish(self, event):
+        what = f"handling {type(event).__name__}"
+        for handler in list(self._subscribers.get(type(event), ())):
+            call_isolated(what, handler, event)
+
+
+class LedgerSummary:
+    """Totals and recent entries, loaded once and then kept current by events.
+
+    Subscribe it before the widgets that draw from it, so it has applied an
+    event by the time they run.
+    """
+    RECENT_EXPENSES = 5
+    RECENT_GOALS = 3
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self, event=None):
+        self.total_income = Money()
+        self.total_expenses = Money()
+        self._categories = {}   # nocase_key(name) -> CategoryTotal
+        self.recent_expenses = deque(maxlen=self.RECENT_EXPENSES)  # newest first
+        self.recent_goals = deque(maxlen=self.RECENT_GOALS)        # newest first
+        self.seen = {}          # base table -> largest id the figures include
+
+    def load(self, readers, conn):
+        """Read everything from readers (database.py or a CachedReaders).
+
+        The reads share one snapshot with seen, so events for rows the
+        figures already include are ignored afterwards.
+        """
+        self.clear()
+        with db.read_snapshot(conn):
+            self.total_income = readers.get_total_income(conn)
+            self.total_expenses = readers.get_total_expenses(conn)
+            for row in readers.get_expenses_by_category(conn):
+                self._categories[db.nocase_key(row.category)] = row
+            self.recent_expenses.extend(readers.get_recent_expenses(conn, limit=self.RECENT_EXPENSES))
+            self.recent_goals.extend(readers.get_recent_savings(conn, limit=self.RECENT_GOALS))
+            self.seen = db.get_max_ids(conn)
+
+    def assign(self, other):
+        """Take over the figures of other, e.g. a summary loaded on a worker thread."""
+        self.total_income = other.total_income
+        self.total_expenses = other.total_expenses
+        self._categories = other._categories
+        self.recent_expenses = other.recent_expenses
+        self.recent_goals = other.recent_goals
+        self.seen = other.seen
+
+    def subscribe(self, bus):
+        bus.subscribe(ExpenseAdded, self.add_expense)
+        bus.subscribe(IncomeAdded, self.add_income)
+        bus.subscribe(GoalAdded, self.add_goal)
+        bus.subscribe(DataCleared, self.clear)
+
+    def _includes(self, event):
+        return event.row_id <= self.seen.get(event.table, 0)
+
+    def add_expense(self, event):
+        if self._includes(event):
+            return
+        expense = event.expense
+        key = db.nocase_key(expense.category)
+        # The database files 'food' under an existing 'Food'; do the same.
+        name, total = self._categories.get(key, (expense.category, Money()))
+        self._categories[key] = CategoryTotal(name, total + expense.amount)
+        self.total_expenses += expense.amount
+        self.recent_expenses.appendleft(RecentExpense(name, expense.amount))
+
+    def add_income(self, event):
+        if self._includes(event):
+            return
+        self.total_income += event.income.amount
+
+    def add_goal(self, event):
+        if self._includes(event):
+            return
+        self.recent_goals.appendleft(RecentGoal(event.goal.goal))
+
+    @property
+    def net(self):
+        return self.total_income - self.total_expenses
+
+    def expenses_by_category(self):
+        """[CategoryTotal] by category name, like db.get_expenses_by_category."""
+        return sorted(self._categories.values(), key=lambda row: db.nocase_key(row.category))
+
+    def top_expenses(self, limit=5):
+        """[CategoryTotal] largest first, like db.get_top_expenses."""
+        return sorted(self._categories.values(), key=lambda row: row.total, reverse=True)[:limit]
@@ -0,0 +1,149 @@
+"""Background reads for the window, run on a QThreadPool.
+
+JobRunner runs fetch(conn, *args) on a worker thread with a reader
+connection checked out of a pool.ConnectionManager, and hands the result to
+deliver(result) on the GUI thread through a queued signal, so the window
+keeps painting while a page's data is read:
+
+    jobs = JobRunner(ConnectionManager(max_readers=4))
+    jobs.busy_changed.connect(show_spinner)
+    jobs.submit((HISTORY_PAGE, 'rows'), db.get_all_transactions, fill_table)
+
+Jobs are keyed by what they load. Submitting a key again supersedes its
+job: a job still queued is dropped, a running one has its query
+interrupted, and a result that arrives anyway is thrown away. Jobs with
+the same key never run at the same time, so a fetch may update an object
+of its own (a LedgerFrame, say) without locking.
+"""
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from callbacks import call_isolated, log
+
+
+class _Job(QRunnable):
+    """One submitted fetch; run() is called on a pool thread."""
+
+    def __init__(self, runner, key, fetch, deliver, args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.runner = runner
+        self.key = key
+        self.fetch = fetch
+        self.deliver = deliver
+        self.args = args
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()   # guards _conn against interrupt()
+
+    def run(self):
+        result = error = None
+        if not self.cancelled:
+            try:
+                result = self._fetch()
+            except Exception as e:
+                error = e
+        self.runner._finished.emit(self, result, error)
+
+    def _fetch(self):
+        manager = self.runner.manager
+        conn = manager.acquire_reader()
+        try:
+            with self._lock:
+                if self.cancelled:
+                    return None
+                self._conn = conn
+            try:
+                return self.fetch(conn, *self.args)
+            finally:
+                with self._lock:
+                    self._conn = None
+        finally:
+            manager.release_reader(conn)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+class JobRunner(QObject):
+    """Runs keyed read jobs on a thread pool, at most one per key at a time."""
+    # Emitted with a job's key when it gets a job to run and when it has none left.
+    busy_changed = pyqtSignal(object, bool)
+    # Emitted on the worker thread; Qt queues it onto the runner's thread.
+    _finished = pyqtSignal(object, object, object)
+
+    def __init__(self, manager, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.pool = QThreadPool(self)
+        # More threads than readers would only have them wait for a connection.
+        self.pool.setMaxThreadCount(max_threads or manager.max_readers)
+        self._running = {}      # key -> job on the pool
+        self._queued = {}       # key -> job to start when the running one ends
+        self._finished.connect(self._on_finished)
+
+    def submit(self, key, fetch, deliver, *args):
+        """Run fetch(conn, *args) in the background, then deliver(result) here.
+
+        Supersedes any job already submitted under key.
+        """
+        job = _Job(self, key, fetch, deliver, args)
+        running = self._running.get(key)
+        if running is None:
+            self._start(job)
+            self.busy_changed.emit(key, True)
+            return
+        running.cancel()
+        superseded = self._queued.get(key)
+        if superseded is not None:
+            superseded.cancel()
+        self._queued[key] = job
+
+    def cancel(self, key):
+        """Drop the job submitted under key; its deliver() is not called."""
+        queued = self._queued.pop(key, None)
+        if queued is not None:
+            queued.cancel()
+        running = self._running.get(key)
+        if running is not None:
+            running.cancel()
+
+    def is_busy(self, key):
+        return key in self._running
+
+    def restart(self):
+        """Submit every unfinished job again, e.g. after a write they may have missed."""
+        for key, job in list(self._running.items()):
+            # A queued job has not read anything yet.
+            if not job.cancelled and key not in self._queued:
+                self.submit(key, job.fetch, job.deliver, *job.args)
+
+    def shutdown(self, timeout_ms=-1):
+        """Cancel everything and wait for the pool's threads to finish."""
+        for key in list(self._running):
+            self.cancel(key)
+        return self.pool.waitForDone(timeout_ms)
+
+    def _start(self, job):
+        self._running[job.key] = job
+        self.pool.start(job)
+
+    @pyqtSlot(object, object, object)
+    def _on_finished(self, job, result, error):
+        key = job.key
+        del self._running[key]
+        following = self._queued.pop(key, None)
+        if following is not None:
+            self._start(following)
+        else:
+            self.busy_changed.emit(key, False)
+        if job.cancelled:
+            return
+        if error is not None:
+            log.error("Error loading %s", key, exc_info=error)
+            return
+        call_isolated(f"showing {key}", job.deliver, result)
@@ -0,0 +1,225 @@
+"""NumPy column snapshot of the expenses and income tables.
+
+LedgerFrame keeps each table as parallel arrays (int64 ids and cents,
+int32 day numbers and int32 category/source codes), so report figures are
+vectorized NumPy expressions instead of one SQL round trip each:
+
+    ledger = LedgerFrame()
+    ledger.refresh(conn)                          # first call loads everything
+    ledger.expenses.total('2024-01-01', '2024-01-31')
+    ledger.expenses.top(5)                        # [(category, Money), ...]
+    ledger.refresh(conn)                          # later calls fetch new rows only
+
+refresh() only fetches the rows above the highest rowid it has already
+loaded. That catches inserts and nothing else, so it also compares the
+table's change counter with the number of new rows; when they differ
+something was updated, deleted or renamed and the table is reloaded.
+"""
+import numpy as np
+
+import database as db
+from money import Money
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+_NAME_READERS = {'expenses': db.get_categories, 'income': db.get_sources}
+
+
+def day_number(date):
+    """Days since 1970-01-01 of a 'yyyy-MM-dd' string, date or datetime64."""
+    return int((np.datetime64(date, 'D') - _EPOCH).astype(np.int64))
+
+
+def month_numbers(days):
+    """Months since 1970-01 of an array of day numbers."""
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int32)
+
+
+# Float64 adds integers exactly up to 2**53, which bounds when bincount can
+# be trusted with cents.
+_EXACT_FLOAT = 2 ** 53
+
+
+def _group_sums(keys, cents):
+    """Distinct keys ascending and the int64 sum of cents for each."""
+    if not len(keys):
+        return keys, cents
+    low = int(keys.min())
+    span = int(keys.max()) - low + 1
+    if span <= 4 * len(keys) and int(np.abs(cents).sum()) < _EXACT_FLOAT:
+        # Keys are codes, days or months: dense small integers, so counting
+        # into buckets beats sorting.
+        offsets = keys - low
+        present = np.flatnonzero(np.bincount(offsets, minlength=span))
+        sums = np.bincount(offsets, weights=cents, minlength=span)
+        return (present + low).astype(keys.dtype), sums[present].astype(np.int64)
+    order = np.argsort(keys, kind='stable')
+    keys, cents = keys[order], cents[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(cents, starts)
+
+
+class LedgerColumns:
+    """One table's rows as parallel arrays in rowid order.
+
+    Range arguments are inclusive dates as accepted by day_number(); names
+    filters to the given categories or sources.
+    """
+    INITIAL_CAPACITY = 1024
+    # Rows converted per np.array() call. Each call holds the GIL until it
+    # returns, so a load on a worker thread hands it back to the GUI thread
+    # between chunks instead of stalling it for the whole table.
+    APPEND_CHUNK = 32768
+
+    def __init__(self, table):
+        self.table = table
+        self.names = {}         # code -> category or source name
+        self._codes_by_name = {}
+        self._clear()
+
+    def _clear(self):
+        self._ids = np.empty(0, np.int64)
+        self._cents = np.empty(0, np.int64)
+        self._days = np.empty(0, np.int32)
+        self._codes = np.empty(0, np.int32)
+        self._size = 0
+        self._changes = None    # change counter the arrays are current with
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def cents(self):
+        return self._cents[:self._size]
+
+    @property
+    def days(self):
+        return self._days[:self._size]
+
+    @property
+    def codes(self):
+        return self._codes[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def refresh(self, conn):
+        """Bring the arrays up to date; returns the number of rows loaded."""
+        with db.read_snapshot(conn):
+            changes = db.get_change_counters(conn).get(self.table, 0)
+            if changes == self._changes:
+                return 0
+            last_id = int(self._ids[self._size - 1]) if self._size else 0
+            rows = db.get_column_rows(conn, self.table, last_id)
+            if self._changes is None or changes - self._changes != len(rows):
+                self._clear()
+                if last_id:
+                    rows = db.get_column_rows(conn, self.table)
+            self.names = dict(_NAME_READERS[self.table](conn))
+        self._codes_by_name = {db.nocase_key(name): code for code, name in self.names.items()}
+        self._append(rows)
+        self._changes = changes
+        return len(rows)
+
+    def _append(self, rows):
+        if not rows:
+            return
+        end = self._size + len(rows)
+        if end > len(self._ids):
+            # Grow geometrically so that a stream of small refreshes stays
+            # amortized O(1) per row.
+            capacity = max(end, 2 * len(self._ids), self.INITIAL_CAPACITY)
+            for name in ('_ids', '_cents', '_days', '_codes'):
+                old = getattr(self, name)
+                grown = np.empty(capacity, old.dtype)
+                grown[:self._size] = old[:self._size]
+                setattr(self, name, grown)
+        for first in range(0, len(rows), self.APPEND_CHUNK):
+            data = np.array(rows[first:first + self.APPEND_CHUNK], dtype=np.int64)
+            start, stop = self._size + first, self._size + first + len(data)
+            self._ids[start:stop] = data[:, 0]
+            self._cents[start:stop] = data[:, 1]
+            self._days[start:stop] = data[:, 2]
+            self._codes[start:stop] = data[:, 3]
+        self._size = end
+
+    def mask(self, start=None, end=None, names=None):
+        """Boolean row mask for the filters, or None when there are none."""
+        mask = None
+        if start is not None:
+            mask = self.days >= day_number(start)
+        if end is not None:
+            upper = self.days <= day_number(end)
+            mask = upper if mask is None else mask & upper
+        if names is not None:
+            codes = [self._codes_by_name.get(db.nocase_key(name), -1) for name in names]
+            picked = np.isin(self.codes, codes)
+            mask = picked if mask is None else mask & picked
+        return mask
+
+    def _select(self, column, mask):
+        return column if mask is None else column[mask]
+
+    def total(self, start=None, end=None, names=None):
+        return Money(int(self._select(self.cents, self.mask(start, end, names)).sum()))
+
+    def count(self, start=None, end=None, names=None):
+        mask = self.mask(start, end, names)
+        return self._size if mask is None else int(np.count_nonzero(mask))
+
+    def group_sums(self, by='name', start=None, end=None, names=None):
+        """(keys, cents) arrays of totals per 'name' code, 'day' or 'month' number."""
+        mask = self.mask(start, end, names)
+        days = self._select(self.days, mask)
+        keys = {'name': lambda: self._select(self.codes, mask),
+                'day': lambda: days,
+                'month': lambda: month_numbers(days)}[by]()
+        return _group_sums(keys, self._select(self.cents, mask))
+
+    def by_name(self, start=None, end=None):
+        """[(name, Money)] per category or source, by name."""
+        codes, sums = self.group_sums('name', start, end)
+        totals = [(self.names.get(int(c), ''), Money(int(s))) for c, s in zip(codes, sums)]
+        return sorted(totals, key=lambda item: db.nocase_key(item[0]))
+
+    def by_month(self, start=None, end=None):
+        """[('yyyy-MM', Money)] per month with any rows, oldest first."""
+        months, sums = self.group_sums('month', start, end)
+        labels = months.astype('datetime64[M]').astype(str).tolist()
+        return [(label, Money(int(s))) for label, s in zip(labels, sums)]
+
+    def top(self, n=5, start=None, end=None):
+        """The n largest categories or sources as [(name, Money)], largest first."""
+        codes, sums = self.group_sums('name', start, end)
+        order = np.argsort(-sums, kind='stable')[:n]
+        return [(self.names.get(int(codes[i]), ''), Money(int(sums[i]))) for i in order]
+
+    def percentile(self, q, start=None, end=None, names=None):
+        """Amount at percentile q (0-100, or a list of them), to the cent.
+
+        None when no rows match.
+        """
+        cents = self._select(self.cents, self.mask(start, end, names))
+        if not len(cents):
+            return None
+        values = np.rint(np.percentile(cents, q)).astype(np.int64)
+        if values.ndim == 0:
+            return Money(int(values))
+        return [Money(int(v)) for v in values]
+
+
+class LedgerFrame:
+    """Column snapshots of expenses and income, refreshed together."""
+
+    def __init__(self):
+        self.expenses = LedgerColumns('expenses')
+        self.income = LedgerColumns('income')
+
+    def refresh(self, conn):
+        """Bring both tables up to date from one snapshot; returns rows loaded."""
+        with db.read_snapshot(conn):
+            return self.expenses.refresh(conn) + self.income.refresh(conn)
+
+    def net(self, start=None, end=None):
+        """Income minus expenses over the range."""
+        return self.income.total(start, end) - self.expenses.total(start, end)
@@ -1,8 +1,10 @@
 import sys
+from dataclasses import replace
 from datetime import datetime
-from PyQt5.QtWidgets import (QMainWindow, QApplication, QTableWidgetItem, QMessageBox,
-                             QHeaderView, QPushButton, QVBoxLayout, QWidget, QTableWidget, QDateEdit, QTextEdit, QLabel, QGroupBox, QHBoxLayout)
-from PyQt5.QtCore import pyqtSlot, QRect, Qt, QDate
+from PyQt5.QtWidgets import (QMainWindow, QApplication, QMessageBox,
+                             QHeaderView, QPushButton, QVBoxLayout, QWidget, QDateEdit, QTextEdit, QLabel, QGroupBox, QHBoxLayout,
+                             QProgressBar)
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QRect, QDate
 
 # --- Matplotlib Imports ---
 import matplotlib.pyplot as plt
@@ -10,10 +12,29 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from budgetPalmain_ui import Ui_MainWindow
 import database as db
-
+from cache import CachedReaders
+from events import (BudgetAdded, DataCleared, EventBus, ExpenseAdded, GoalAdded, IncomeAdded,
+                    LedgerSummary)
+from jobs import JobRunner
+from ledger_frame import LedgerFrame
+from money import Money
+from monitor import ChangeMonitor
+from pages import PageScheduler
+from pool import ConnectionManager
+from rows import Budget, Expense, Income, SavingsGoal
+from table_models import LedgerTableModel, header_labels, replace_with_view, table_view
+from writer import GroupCommitWriter
+
+# stackedWidget page indexes, in the order of the navigation buttons.
+(DASHBOARD_PAGE, INCOME_PAGE, EXPENSE_PAGE, BUDGET_PAGE, SAVINGS_PAGE, REPORTS_PAGE,
+ HISTORY_PAGE, SETTINGS_PAGE) = range(8)
 
 
 class MainWindow(QMainWindow):
+    # Emitted from the writer thread; Qt queues it onto the GUI thread.
+    write_finished = pyqtSignal(object, str)
+    clear_finished = pyqtSignal(object)
+
     def __init__(self):
         super(MainWindow, self).__init__()
 
@@ -31,11 +52,41 @@ class MainWindow(QMainWindow):
         # --- Database Setup ---
         self.conn = db.create_connection()
         db.create_all_tables(self.conn)
+        # The writer thread's connection and the page readers' pool.
+        self.connections = ConnectionManager()
+        # Inserts run on a background thread with group commit so that the
+        # GUI thread never waits on a COMMIT.
+        self.writer = GroupCommitWriter(manager=self.connections)
+        self.write_finished.connect(self.on_write_finished)
+        self.clear_finished.connect(self.on_clear_finished)
+        # Column snapshot of expenses and income for the report charts; each
+        # refresh only reads the rows added since the last one.
+        self.ledger = LedgerFrame()
+        # Writes publish an event once they commit, and each widget subscribes
+        # to the events it shows (see setup_event_subscribers).
+        self.events = EventBus()
+        self.summary = LedgerSummary()
+        # The summary's reads, served from memory while their tables are
+        # unchanged: an expense leaves the income and savings reads cached.
+        self.readers = CachedReaders()
+        self._pending_events = {}   # writer future -> event to publish
+        # Page data is read on a thread pool, each job on a reader connection
+        # of its own, so the window keeps painting while a large ledger loads.
+        self.jobs = JobRunner(self.connections, parent=self)
+        self.jobs.busy_changed.connect(self.on_job_busy)
+        # Picks up commits from other connections: other BudgetPal windows,
+        # scripts, and our own writer thread.
+        self.change_monitor = ChangeMonitor(db.DB_FILE, parent=self)
+        self.change_monitor.tables_changed.connect(self.on_tables_changed)
 
         # --- Initial UI State ---
         self.ui.icons_only_widget.hide()
         self.ui.stackedWidget.setCurrentIndex(0)
         self.ui.dashboard_btn2.setChecked(True)
+        # Only the visible page is refreshed right away; the others are
+        # marked stale and catch up when they are shown.
+        self.pages = PageScheduler(self.ui.stackedWidget.currentIndex())
+        self.ui.stackedWidget.currentChanged.connect(self.pages.show)
 
         # --- Page-Specific Setups ---
         self.setup_dashboard()
@@ -44,6 +95,10 @@ class MainWindow(QMainWindow):
         self.setup_budget_page()
         self.setup_reports_page()
         self.setup_settings_page()
+        self.setup_table_views()
+        self.setup_event_subscribers()
+        self.setup_change_routes()
+        self.setup_busy_indicators()
 
         # --- Connect Signals to Slots ---
         self.ui.expenseAddButton.clicked.connect(self.add_expense)
@@ -110,10 +165,9 @@ class MainWindow(QMainWindow):
         self.ui.label_78.hide()
         self.ui.label_79.hide()
         self.ui.label_80.hide()
-        self.income_history_table = QTableWidget(self.ui.frame_3)
+        self.income_model = LedgerTableModel('income', ["Date", "Source", "Amount", "Notes"], self.conn)
+        self.income_history_table = table_view(self.ui.frame_3, self.income_model)
         self.income_history_table.setGeometry(QRect(240, 310, 380, 191))
-        self.income_history_table.setColumnCount(4)
-        self.income_history_table.setHorizontalHeaderLabels(["Date", "Source", "Amount", "Notes"])
         self.ui.lineEdit_6.hide()
         self.income_date_picker = QDateEdit(self.ui.frame_3)
         self.income_date_picker.setGeometry(self.ui.lineEdit_6.geometry())
@@ -225,14 +279,145 @@ class MainWindow(QMainWindow):
         self.ui.frame_9.setLayout(settings_layout)
 
 
+    def setup_table_views(self):
+        # The designer's QTableWidgets are swapped for views of models that
+        # hold the rows column by column and format cells as they are drawn.
+        self.expense_model = LedgerTableModel('expenses', header_labels(self.ui.expenseTable), self.conn)
+        self.expense_view = replace_with_view(self.ui.expenseTable, self.expense_model)
+        # Both budget tables list the budgets, under different headings.
+        self.budget_models = tuple(LedgerTableModel('budgets', header_labels(table), self.conn)
+                                   for table in (self.ui.tableWidget, self.ui.tableWidget_2))
+        self.budget_views = (replace_with_view(self.ui.tableWidget, self.budget_models[0]),
+                             replace_with_view(self.ui.tableWidget_2, self.budget_models[1]))
+        self.savings_model = LedgerTableModel('savings_goals', header_labels(self.ui.tableWidget_3), self.conn)
+        self.savings_view = replace_with_view(self.ui.tableWidget_3, self.savings_model)
+        self.savings_view.setWordWrap(True)
+        self.savings_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.history_model = LedgerTableModel('transactions', header_labels(self.ui.tableWidget_4), self.conn)
+        self.history_view = replace_with_view(self.ui.tableWidget_4, self.history_model)
+        self.savings_model.modelReset.connect(self.savings_view.resizeRowsToContents)
+        # Clicking a header re-reads the model in the background too, and
+        # so does scrolling onto rows the model has not read yet or dropped.
+        for model in self.table_models():
+            model.loader = self.load_model
+            model.jobs = self.jobs
+
+    def table_models(self):
+        return (self.expense_model, self.income_model, *self.budget_models,
+                self.savings_model, self.history_model)
+
+    def setup_event_subscribers(self):
+        # The summary goes first: the totals and charts draw from it.
+        self.summary.subscribe(self.events)
+        # Inserting a row costs the same on any page, so tables stay current.
+        immediate = {
+            ExpenseAdded: (self.insert_expense_row, self.insert_history_row),
+            IncomeAdded: (self.insert_income_row, self.insert_history_row),
+            BudgetAdded: (self.insert_budget_row,),
+            GoalAdded: (self.insert_goal_row,),
+            DataCleared: (self.clear_tables,),
+        }
+        # Redraws wait for their page to be shown.
+        deferred = {
+            ExpenseAdded: ((INCOME_PAGE, self.update_totals),
+                           (DASHBOARD_PAGE, self.update_dashboard_graph),
+                           (DASHBOARD_PAGE, self.update_dashboard_overview),
+                           (EXPENSE_PAGE, self.update_expense_graph),
+                           (REPORTS_PAGE, self.update_reports_from_summary)),
+            IncomeAdded: ((INCOME_PAGE, self.update_totals),
+                          (REPORTS_PAGE, self.update_reports_from_summary)),
+            GoalAdded: ((DASHBOARD_PAGE, self.update_dashboard_overview),),
+            DataCleared: ((INCOME_PAGE, self.update_totals),
+                          (DASHBOARD_PAGE, self.update_dashboard_graph),
+                          (DASHBOARD_PAGE, self.update_dashboard_overview),
+                          (EXPENSE_PAGE, self.update_expense_graph),
+                          (REPORTS_PAGE, self.update_reports_from_summary)),
+        }
+        for event_type, handlers in immediate.items():
+            for handler in handlers:
+                self.events.subscribe(event_type, handler)
+        for event_type, refreshes in deferred.items():
+            for page, refresh in refreshes:
+                self.events.subscribe(event_type, lambda event, page=page, refresh=refresh:
+                                      self.pages.schedule(page, refresh))
+        # A job that was already reading when the write committed may not
+        # see it, and its result would undo the update; read again.
+        for event_type in immediate:
+            self.events.subscribe(event_type, lambda event: self.jobs.restart())
+
+    def setup_change_routes(self):
+        # What reads each base table, for commits made by other connections:
+        # the pages whose tables or charts load it...
+        self.table_loaders = {
+            'expenses': ((EXPENSE_PAGE, self.load_expenses),
+                         (HISTORY_PAGE, self.load_history),
+                         (REPORTS_PAGE, self.update_reports_page)),
+            'income': ((INCOME_PAGE, self.load_income),
+                       (HISTORY_PAGE, self.load_history),
+                       (REPORTS_PAGE, self.update_reports_page)),
+            'budgets': ((BUDGET_PAGE, self.load_budgets),),
+            'savings_goals': ((SAVINGS_PAGE, self.load_savings),),
+        }
+        # ...and the widgets drawn from the parts of the summary it feeds.
+        self.summary_refreshes = {
+            'expenses': ((INCOME_PAGE, self.update_totals),
+                         (DASHBOARD_PAGE, self.update_dashboard_graph),
+                         (EXPENSE_PAGE, self.update_expense_graph),
+                         (DASHBOARD_PAGE, self.update_dashboard_overview)),
+            'income': ((INCOME_PAGE, self.update_totals),),
+            'savings_goals': ((DASHBOARD_PAGE, self.update_dashboard_overview),),
+        }
+        # Tables whose summary widgets wait for the next summary; a new
+        # summary job supersedes the last, so they accumulate until it is shown.
+        self._stale_summary = set()
+
+    def setup_busy_indicators(self):
+        # Pages each job's result is shown on; models are keyed by themselves.
+        self.job_pages = {
+            'summary': (DASHBOARD_PAGE, INCOME_PAGE, EXPENSE_PAGE),
+            'reports': (REPORTS_PAGE,),
+            self.expense_model: (EXPENSE_PAGE,),
+            self.income_model: (INCOME_PAGE,),
+            self.budget_models[0]: (BUDGET_PAGE,),
+            self.budget_models[1]: (BUDGET_PAGE,),
+            self.savings_model: (SAVINGS_PAGE,),
+            self.history_model: (HISTORY_PAGE,),
+        }
+        self._busy_jobs = {}    # page -> keys of its unfinished jobs
+        # A thin animated bar in the top right corner of a page while it loads.
+        self.busy_bars = []
+        for page in range(self.ui.stackedWidget.count()):
+            bar = QProgressBar(self.ui.stackedWidget.widget(page))
+            bar.setRange(0, 0)
+            bar.setTextVisible(False)
+            bar.setGeometry(QRect(551, 8, 80, 6))
+            bar.hide()
+            self.busy_bars.append(bar)
+
     def confirm_clear_data(self):
         reply = QMessageBox.warning(self, 'Confirm Deletion',
                                      "Are you sure you want to delete all your financial data? This action cannot be undone.",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            db.delete_all_records(self.conn)
+            # The writer runs the clear after the inserts already queued, so
+            # they are cleared too, and the GUI thread goes on painting.
+            for table in db.BASE_TABLES:
+                self.change_monitor.poller.expect(table)
+            future = self.writer.delete_all_records()
+            future.add_done_callback(self.clear_finished.emit)
+
+    @pyqtSlot(object)
+    def on_clear_finished(self, future):
+        error = future.exception()
+        if error is not None:
+            for table in db.BASE_TABLES:
+                self.change_monitor.poller.expect(table, -1)
+            QMessageBox.critical(self, "Error", f"Could not clear data: {error}")
+            # Nothing was deleted; show the records as they are.
             self.refresh_all_data()
-            QMessageBox.information(self, "Success", "All data has been cleared.")
+            return
+        self.events.publish(DataCleared())
+        QMessageBox.information(self, "Success", "All data has been cleared.")
 
     # Placeholder functions for export/import
     def export_data_placeholder(self):
@@ -242,27 +427,54 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Feature Coming Soon", "Import Data functionality will be available in a future update!")
 
     def refresh_all_data(self):
-        self.load_expenses()
-        self.load_income()
-        self.load_budgets()
-        self.load_savings()
-        self.load_history()
-        self.update_reports_page()
-        self.update_dashboard_graph()
-        self.update_expense_graph()
-        self.update_dashboard_overview()
+        self.refresh_tables(db.BASE_TABLES)
         print("UI Refreshed.")
 
-    def update_dashboard_graph(self):
+    def refresh_tables(self, tables):
+        """Reload only what reads tables; hidden pages wait until shown."""
+        stale = self.summary_refreshes.keys() & tables
+        if stale:
+            self._stale_summary |= stale
+            self.jobs.submit('summary', self.read_summary, self.show_summary)
+        # A page that reads several of the tables loads once.
+        loads = dict.fromkeys(load for table in tables for load in self.table_loaders[table])
+        for page, load in loads:
+            self.pages.schedule(page, load)
+
+    def read_summary(self, conn):
+        summary = LedgerSummary()
+        summary.load(self.readers, conn)
+        return summary
+
+    def show_summary(self, summary):
+        self.summary.assign(summary)
+        refreshes = dict.fromkeys(refresh for table in self._stale_summary
+                                  for refresh in self.summary_refreshes[table])
+        self._stale_summary = set()
+        for page, refresh in refreshes:
+            self.pages.schedule(page, refresh)
+
+    @pyqtSlot(object, bool)
+    def on_job_busy(self, key, busy):
+        # A model's page reads are keyed (model, page).
+        for page in self.job_pages[key[0] if isinstance(key, tuple) else key]:
+            keys = self._busy_jobs.setdefault(page, set())
+            if busy:
+                keys.add(key)
+            else:
+                keys.discard(key)
+            self.busy_bars[page].setVisible(bool(keys))
+
+    def update_dashboard_graph(self, event=None):
         self.figure.clear()
         ax = self.figure.add_subplot(111)
-        expense_data = db.get_expenses_by_category(self.conn)
+        expense_data = self.summary.expenses_by_category()
         if not expense_data:
             ax.text(0.5, 0.5, 'No expense data to display',
                     ha='center', va='center', transform=ax.transAxes)
             ax.axis('off')
         else:
-            ax.pie([x[1] for x in expense_data], labels=[x[0] for x in expense_data], autopct='%1.1f%%', startangle=90)
+            ax.pie([float(x[1]) for x in expense_data], labels=[x[0] for x in expense_data], autopct='%1.1f%%', startangle=90)
             # MODIFICATION: Use a figure suptitle instead of an axis title.
             self.figure.suptitle("Expense Breakdown")
         
@@ -270,11 +482,11 @@ class MainWindow(QMainWindow):
         self.figure.tight_layout()
         self.canvas.draw()
 
-    def update_expense_graph(self):
+    def update_expense_graph(self, event=None):
         self.expense_figure.clear()
         ax = self.expense_figure.add_subplot(111)
 
-        recent_expenses = db.get_recent_expenses(self.conn, limit=5)
+        recent_expenses = list(self.summary.recent_expenses)
 
         if not recent_expenses:
             ax.text(0.5, 0.5, 'No recent expenses to display',
@@ -283,7 +495,7 @@ class MainWindow(QMainWindow):
         else:
             recent_expenses.reverse()
             categories = [x[0] for x in recent_expenses]
-            amounts = [x[1] for x in recent_expenses]
+            amounts = [float(x[1]) for x in recent_expenses]
 
             ax.barh(categories, amounts, color='#7293CB')
             ax.set_title("5 Most Recent Expenses", fontsize=10)
@@ -303,9 +515,9 @@ class MainWindow(QMainWindow):
         self.expense_canvas.draw()
 
 
-    def update_dashboard_overview(self):
-        recent_expenses = db.get_recent_expenses(self.conn, limit=3)
-        recent_savings = db.get_recent_savings(self.conn, limit=3)
+    def update_dashboard_overview(self, event=None):
+        recent_expenses = list(self.summary.recent_expenses)[:3]
+        recent_savings = list(self.summary.recent_goals)
 
         overview_html = """
         <style>
@@ -336,6 +548,38 @@ class MainWindow(QMainWindow):
         overview_html += "</td></tr></table>"
         self.overview_text.setHtml(overview_html)
 
+    def submit_write(self, what, event, method, *args):
+        """Queue a write on the background writer; event is published once it commits.
+
+        The event's row_id is filled in with the id of the inserted row.
+        Raises RuntimeError if the writer has been closed; the write's own
+        errors are reported once it has run.
+        """
+        # Our own insert must not look like another connection's change.
+        self.change_monitor.poller.expect(event.table)
+        try:
+            future = method(*args)
+        except Exception:
+            self.change_monitor.poller.expect(event.table, -1)
+            raise
+        self._pending_events[future] = event
+        future.add_done_callback(lambda f: self.write_finished.emit(f, what))
+        return future
+
+    @pyqtSlot(object, str)
+    def on_write_finished(self, future, what):
+        event = self._pending_events.pop(future)
+        error = future.exception()
+        if error is not None:
+            self.change_monitor.poller.expect(event.table, -1)
+            QMessageBox.critical(self, "Error", f"Could not add {what}: {error}")
+            return
+        self.events.publish(replace(event, row_id=future.result()))
+
+    @pyqtSlot(object)
+    def on_tables_changed(self, tables):
+        self.refresh_tables(tables)
+
     @pyqtSlot()
     def add_expense(self):
         amount_text = self.ui.lineEdit.text()
@@ -346,12 +590,12 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Amount and Category cannot be empty.")
             return
         try:
-            expense = (float(amount_text), category, date, time)
-            db.add_expense(self.conn, expense)
+            amount = Money.of(amount_text)
+            self.submit_write("expense", ExpenseAdded(None, Expense(amount, date, time, category)),
+                              self.writer.add_expense, (amount, category, date, time))
             self.ui.lineEdit.clear()
             self.ui.lineEdit_2.clear()
-            self.refresh_all_data()
-        except (ValueError, Exception) as e:
+        except (ValueError, RuntimeError) as e:
             QMessageBox.critical(self, "Error", f"Could not add expense: {e}")
 
     @pyqtSlot()
@@ -364,13 +608,13 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Amount and Source are required.")
             return
         try:
-            income_record = (float(amount), source, date, notes)
-            db.add_income(self.conn, income_record)
+            amount = Money.of(amount)
+            self.submit_write("income", IncomeAdded(None, Income(date, source, amount, notes)),
+                              self.writer.add_income, (amount, source, date, notes))
             self.ui.lineEdit_4.clear()
             self.ui.lineEdit_5.clear()
             self.ui.lineEdit_7.clear()
-            self.refresh_all_data()
-        except (ValueError, Exception) as e:
+        except (ValueError, RuntimeError) as e:
             QMessageBox.critical(self, "Error", f"Could not add income: {e}")
 
     @pyqtSlot()
@@ -381,11 +625,10 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Budget name cannot be empty.")
             return
         try:
-            budget = (name, 0, date)
-            db.add_budget(self.conn, budget)
+            self.submit_write("budget", BudgetAdded(None, Budget(name, Money()), date),
+                              self.writer.add_budget, (name, Money(), date))
             self.ui.lineEdit_3.clear()
-            self.refresh_all_data()
-        except Exception as e:
+        except RuntimeError as e:
             QMessageBox.critical(self, "Error", f"Could not add budget: {e}")
 
     @pyqtSlot()
@@ -395,102 +638,71 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Goal description cannot be empty.")
             return
         try:
-            db.add_saving_goal(self.conn, (goal, datetime.now().strftime("%Y-%m-%d")))
+            date = datetime.now().strftime("%Y-%m-%d")
+            self.submit_write("saving goal", GoalAdded(None, SavingsGoal(goal, date)),
+                              self.writer.add_saving_goal, (goal, date))
             self.ui.textEdit.clear()
-            self.refresh_all_data()
-        except Exception as e:
+        except RuntimeError as e:
             QMessageBox.critical(self, "Error", f"Could not add saving goal: {e}")
 
+    def load_model(self, model, sort=None):
+        """Read model's first page on the job pool and show it once read."""
+        self.jobs.submit(model, model.read_first_page, model.show_first_page, sort)
+
     def load_expenses(self):
-        try:
-            expenses = db.get_all_expenses(self.conn)
-            self.ui.expenseTable.setRowCount(0)
-            for r, rd in enumerate(expenses):
-                self.ui.expenseTable.insertRow(r)
-                for c, d in enumerate(rd): self.ui.expenseTable.setItem(r, c, QTableWidgetItem(str(d)))
-        except Exception as e:
-            print(f"Failed to load expenses: {e}")
+        self.load_model(self.expense_model)
+
+    def update_totals(self, event=None):
+        self.ui.textBrowser_3.setText(f"P{self.summary.total_income:.2f}")
+        self.ui.textBrowser_4.setText(f"P{self.summary.total_expenses:.2f}")
+        self.ui.textBrowser_5.setText(f"P{self.summary.net:.2f}")
 
     def load_income(self):
-        try:
-            total_income, total_expenses = db.get_total_income(self.conn), db.get_total_expenses(self.conn)
-            self.ui.textBrowser_3.setText(f"P{total_income:.2f}")
-            self.ui.textBrowser_4.setText(f"P{total_expenses:.2f}")
-            self.ui.textBrowser_5.setText(f"P{total_income - total_expenses:.2f}")
-            all_income = db.get_all_income(self.conn)
-            self.income_history_table.setRowCount(0)
-            for row_num, row_data in enumerate(all_income):
-                self.income_history_table.insertRow(row_num)
-                for col_num, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                    self.income_history_table.setItem(row_num, col_num, item)
-        except Exception as e:
-            print(f"Failed to load income: {e}")
+        self.load_model(self.income_model)
 
     def load_budgets(self):
-        try:
-            budgets = db.get_all_budgets(self.conn)
-            self.ui.tableWidget.setRowCount(0); self.ui.tableWidget_2.setRowCount(0)
-            for r, rd in enumerate(budgets):
-                self.ui.tableWidget.insertRow(r); self.ui.tableWidget_2.insertRow(r)
-                for c, d in enumerate(rd):
-                    self.ui.tableWidget.setItem(r, c, QTableWidgetItem(str(d)))
-                    self.ui.tableWidget_2.setItem(r, c, QTableWidgetItem(str(d)))
-        except Exception as e:
-            print(f"Failed to load budgets: {e}")
+        for model in self.budget_models:
+            self.load_model(model)
 
     def load_savings(self):
-        try:
-            self.ui.tableWidget_3.setWordWrap(True)
-            self.ui.tableWidget_3.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-            goals = db.get_all_savings_goals(self.conn)
-            self.ui.tableWidget_3.setRowCount(0)
-            for row_num, row_data in enumerate(goals):
-                self.ui.tableWidget_3.insertRow(row_num)
-                for col_num, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                    self.ui.tableWidget_3.setItem(row_num, col_num, item)
-                self.ui.tableWidget_3.resizeRowToContents(row_num)
-        except Exception as e:
-            print(f"Failed to load savings: {e}")
+        self.load_model(self.savings_model)
 
     def load_history(self):
-        try:
-            transactions = db.get_all_transactions(self.conn)
-            self.ui.tableWidget_4.setRowCount(0)
-            for r, rd in enumerate(transactions):
-                self.ui.tableWidget_4.insertRow(r)
-                self.ui.tableWidget_4.setItem(r, 0, QTableWidgetItem(str(rd[1])))
-                self.ui.tableWidget_4.setItem(r, 1, QTableWidgetItem(str(rd[2])))
-                self.ui.tableWidget_4.setItem(r, 2, QTableWidgetItem(str(rd[0])))
-        except Exception as e:
-            print(f"Failed to load history: {e}")
-
-    def update_reports_page(self):
-        self.bar_figure.clear()
-        ax1 = self.bar_figure.add_subplot(111)
-        total_income = db.get_total_income(self.conn)
-        total_expenses = db.get_total_expenses(self.conn)
-        ax1.bar(['Income', 'Expenses'], [total_income, total_expenses], color=['#2ECC71', '#E74C3C'])
-        ax1.set_title('Total Income vs. Expenses')
-        ax1.set_ylabel('Amount (P)')
-        self.bar_figure.tight_layout()
-        self.bar_canvas.draw()
-        self.pie_figure.clear()
-        ax2 = self.pie_figure.add_subplot(111)
-        top_expenses = db.get_top_expenses(self.conn)
-        if not top_expenses:
-            ax2.text(0.5, 0.5, 'No expense data to display',
-                     ha='center', va='center', transform=ax2.transAxes)
-            ax2.axis('off')
+        self.load_model(self.history_model)
+
+    # --- Incremental updates: one row per event instead of a reload ---
+    def insert_expense_row(self, event):
+        amount, date, time, category = event.expense
+        self.expense_model.insert_row((amount.cents, date, time, category), event.row_id,
+                                    event.table)
+
+    def insert_income_row(self, event):
+        date, source, amount, notes = event.income
+        self.income_model.insert_row((date, source, amount.cents, notes), event.row_id,
+                                   event.table)
+
+    def insert_history_row(self, event):
+        if isinstance(event, ExpenseAdded):
+            date, description, amount = event.expense.date, event.expense.category, event.expense.amount
         else:
-            ax2.pie([x[1] for x in top_expenses], labels=[x[0] for x in top_expenses], autopct='%1.1f%%', startangle=90)
-            ax2.set_title('Top 5 Expense Categories')
-        self.pie_figure.tight_layout()
-        self.pie_canvas.draw()
-        print("Reports page updated.")
+            date, description, amount = event.income.date, event.income.source, event.income.amount
+        self.history_model.insert_row((description, amount.cents, date),
+                                      db.transaction_id(event.table, event.row_id), event.table)
+
+    def insert_budget_row(self, event):
+        name, amount = event.budget
+        for model in self.budget_models:
+            model.insert_row((name, amount.cents, event.date), event.row_id, event.table)
+
+    def insert_goal_row(self, event):
+        row = self.savings_model.insert_row(tuple(event.goal), event.row_id, event.table)
+        # None: the goal sorts past the rows fetched so far, or its page has it.
+        if row is not None:
+            self.savings_view.resizeRowToContents(row)
+
+    def clear_tables(self, event=None):
+        for model in self.table_models():
+            model.clear()
 
     def on_dashboard_btn2_toggled(self, c):
         if c: self.ui.stackedWidget.setCurrentIndex(0)
@@ -510,6 +722,11 @@ class MainWindow(QMainWindow):
         if c: self.ui.stackedWidget.setCurrentIndex(7)
         
     def closeEvent(self, event):
+        self.change_monitor.stop()
+        self.jobs.shutdown()
+        # The writer commits what is still queued on the manager's connection.
+        self.writer.close()
+        self.connections.close()
         if self.conn: self.conn.close()
         super().closeEvent(event)
         
@@ -537,11 +754,21 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.pie_canvas)
 
     def update_reports_page(self):
+        self.jobs.submit('reports', self.read_reports, lambda figures: self.draw_reports(*figures))
+
+    def read_reports(self, conn):
+        # Only 'reports' jobs touch the ledger, and they never run two at a time.
+        self.ledger.refresh(conn)
+        return self.ledger.income.total(), self.ledger.expenses.total(), self.ledger.expenses.top(5)
+
+    def update_reports_from_summary(self, event=None):
+        self.draw_reports(self.summary.total_income, self.summary.total_expenses,
+                          self.summary.top_expenses(5))
+
+    def draw_reports(self, total_income, total_expenses, top_expenses):
         self.bar_figure.clear()
         ax1 = self.bar_figure.add_subplot(111)
-        total_income = db.get_total_income(self.conn)
-        total_expenses = db.get_total_expenses(self.conn)
-        ax1.bar(['Income', 'Expenses'], [total_income, total_expenses], color=['#2ECC71', '#E74C3C'])
+        ax1.bar(['Income', 'Expenses'], [float(total_income), float(total_expenses)], color=['#2ECC71', '#E74C3C'])
         ax1.set_title('Total Income vs. Expenses')
         ax1.set_ylabel('Amount (PHP)')
         self.bar_figure.tight_layout()
@@ -549,13 +776,12 @@ class MainWindow(QMainWindow):
 
         self.pie_figure.clear()
         ax2 = self.pie_figure.add_subplot(111)
-        top_expenses = db.get_top_expenses(self.conn)
         if not top_expenses:
             ax2.text(0.5, 0.5, 'No expense data to display',
                      ha='center', va='center', transform=ax2.transAxes)
             ax2.axis('off')
         else:
-            ax2.pie([x[1] for x in top_expenses],
+            ax2.pie([float(x[1]) for x in top_expenses],
                     labels=[x[0] for x in top_expenses],
                     autopct='%1.1f%%',
                     startangle=90)
@@ -0,0 +1,172 @@
+"""Exact money amounts.
+
+The database stores every amount as an integer number of centavos, and
+Money carries that integer through Python, so totals and differences are
+exact no matter how many rows go into them:
+
+    price = Money.of('19.99')          # from user input, in pesos
+    total = sum([price, price])        # Money.of('39.98')
+    f"P{total:.2f}"                    # 'P39.98'
+
+Money is passed to sqlite3 as its integer cents, so it can be used directly
+as a query parameter.
+"""
+import operator
+import sqlite3
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENTS_PER_UNIT = 100
+# SQLite stores integers in at most 64 bits.
+MAX_CENTS = 2**63 - 1
+_CENT = Decimal('0.01')
+
+
+class Money:
+    """An amount of money as an integer number of cents; immutable."""
+    __slots__ = ('_cents',)
+
+    def __init__(self, cents=0):
+        if type(cents) is not int:
+            try:
+                if isinstance(cents, bool):
+                    raise TypeError
+                cents = operator.index(cents)
+            except TypeError:
+                raise TypeError(f"Money takes integer cents, not {type(cents).__name__}; "
+                                f"use Money.of() for amounts in pesos") from None
+        object.__setattr__(self, '_cents', cents)
+
+    @classmethod
+    def of(cls, value):
+        """Money from an amount in pesos: a str, int, float, Decimal or Money.
+
+        Rounds half up to the nearest cent. Floats are taken at their
+        shortest repr, so Money.of(0.1) is exactly 10 cents. Raises
+        ValueError for text that is not a number, for NaN or infinity, and
+        for amounts beyond MAX_CENTS either way.
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, bool):
+            raise TypeError("Money.of() does not take a bool")
+        if isinstance(value, int):
+            cents = value * CENTS_PER_UNIT
+        else:
+            if isinstance(value, float):
+                value = repr(value)
+            if isinstance(value, str):
+                text = value.strip().replace(',', '')
+                try:
+                    value = Decimal(text)
+                except InvalidOperation:
+                    raise ValueError(f"Not an amount of money: {value!r}") from None
+            if not isinstance(value, Decimal):
+                raise TypeError(f"Cannot make Money from {type(value).__name__}")
+            if not value.is_finite():
+                raise ValueError(f"Not an amount of money: {value}")
+            try:
+                cents = int(value.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+            except InvalidOperation:
+                # More digits than the decimal context holds.
+                raise ValueError(f"Amount of money out of range: {value}") from None
+        if not -MAX_CENTS <= cents <= MAX_CENTS:
+            raise ValueError(f"Amount of money out of range: {value}")
+        return cls(cents)
+
+    @property
+    def cents(self):
+        return self._cents
+
+    def to_decimal(self):
+        return Decimal(self._cents).scaleb(-2)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money is immutable")
+
+    def __conform__(self, protocol):
+        if protocol is sqlite3.PrepareProtocol:
+            return self._cents
+
+    def __reduce__(self):
+        return (Money, (self._cents,))
+
+    # --- Arithmetic ---
+    # Money combines only with Money; 0 is accepted so that sum() works.
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self._cents + other._cents)
+        if isinstance(other, int) and other == 0:
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self._cents - other._cents)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return Money(self._cents * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self._cents)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Money(abs(self._cents))
+
+    def __bool__(self):
+        return self._cents != 0
+
+    # --- Comparison ---
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self._cents == other._cents
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((Money, self._cents))
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self._cents < other._cents
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, Money):
+            return self._cents <= other._cents
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, Money):
+            return self._cents > other._cents
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, Money):
+            return self._cents >= other._cents
+        return NotImplemented
+
+    # --- Conversion ---
+    def __float__(self):
+        """For charts only; never do arithmetic on the result."""
+        return self._cents / CENTS_PER_UNIT
+
+    def __str__(self):
+        sign = '-' if self._cents < 0 else ''
+        units, cents = divmod(abs(self._cents), CENTS_PER_UNIT)
+        return f"{sign}{units}.{cents:02d}"
+
+    def __repr__(self):
+        return f"Money.of('{self}')"
+
+    def __format__(self, spec):
+        # Numeric specs such as '.2f' or ',.2f' format the exact decimal value.
+        return format(self.to_decimal(), spec) if spec else str(self)
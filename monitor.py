@@ -0,0 +1,88 @@
+"""Notice writes made to budget.db by other connections and processes.
+
+A second BudgetPal window, an import script or the background writer all
+commit through their own connections, which this process's views never
+hear about directly. ChangeMonitor polls `PRAGMA data_version` on a
+timer; that value only changes when some other connection has committed, so
+an idle poll is a single PRAGMA. When it does change, the per-table
+change_counters maintained by triggers say exactly which tables moved, and
+`tables_changed` is emitted with their names:
+
+    monitor = ChangeMonitor(interval_ms=500)
+    monitor.tables_changed.connect(window.refresh_tables)
+
+Writes this process already handles itself (the window's own entries,
+queued on the background writer) can be announced with expect() before
+they are submitted; the row changes they make are then not reported.
+"""
+import sqlite3
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import database as db
+
+
+class ChangePoller:
+    """The Qt-free part of ChangeMonitor: call poll() to get the changed tables."""
+
+    def __init__(self, db_file=db.DB_FILE):
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA query_only = ON")
+        self._data_version = db.get_data_version(self.conn)
+        self._counters = db.get_change_counters(self.conn)
+        self._expected = {}     # table -> row changes announced but not yet seen
+
+    def expect(self, table, changes=1):
+        """Announce row changes to table that poll() should not report.
+
+        Call it before submitting the write, and again with a negative count
+        if the write fails, so that the announcement is withdrawn.
+        """
+        self._expected[table] = max(0, self._expected.get(table, 0) + changes)
+
+    def poll(self):
+        """Return the frozenset of tables changed by others since the last poll."""
+        data_version = db.get_data_version(self.conn)
+        if data_version == self._data_version:
+            return frozenset()
+        self._data_version = data_version
+        counters = db.get_change_counters(self.conn)
+        changed = set()
+        for name in counters.keys() | self._counters.keys():
+            delta = counters.get(name, 0) - self._counters.get(name, 0)
+            own = min(delta, self._expected.get(name, 0)) if delta > 0 else 0
+            if own:
+                self._expected[name] -= own
+            if delta != own:
+                changed.add(name)
+        self._counters = counters
+        return frozenset(changed)
+
+    def close(self):
+        self.conn.close()
+
+
+class ChangeMonitor(QObject):
+    """Emits tables_changed(frozenset) when another connection commits to them."""
+    tables_changed = pyqtSignal(object)
+
+    def __init__(self, db_file=db.DB_FILE, interval_ms=500, parent=None):
+        super().__init__(parent)
+        self.poller = ChangePoller(db_file)
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+
+    def poll(self):
+        try:
+            changed = self.poller.poll()
+        except sqlite3.Error as e:
+            print(f"Error polling for database changes: {e}")
+            return
+        if changed:
+            self.tables_changed.emit(changed)
+
+    def stop(self):
+        self.timer.stop()
+        self.poller.close()
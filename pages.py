@@ -0,0 +1,37 @@
+"""Refresh work for stackedWidget pages, deferred until a page is shown.
+
+Only one page of the window is visible at a time, so redrawing the others
+after every write is wasted work. PageScheduler runs a page's refresh
+functions straight away while that page is current and otherwise only
+marks the page stale, remembering which refreshes it still owes. Showing
+the page runs them, each once however many writes asked for it:
+
+    pages = PageScheduler(current=0)
+    pages.schedule(5, window.update_reports_page)   # reports hidden: deferred
+    pages.show(5)                                    # runs it now
+"""
+from callbacks import call_isolated
+
+
+class PageScheduler:
+    """Per-page dirty flags, each with the refreshes that will clear it."""
+
+    def __init__(self, current=0):
+        self.current = current
+        self._pending = {}      # page -> {refresh: None}, in scheduling order
+
+    def schedule(self, page, refresh):
+        """Run refresh() now if page is current, else when it is next shown."""
+        if page == self.current:
+            call_isolated("refreshing page", refresh)
+        else:
+            self._pending.setdefault(page, {})[refresh] = None
+
+    def is_stale(self, page):
+        return page in self._pending
+
+    def show(self, page):
+        """Make page current and run the refreshes it has missed."""
+        self.current = page
+        for refresh in self._pending.pop(page, ()):
+            call_isolated("refreshing page", refresh)
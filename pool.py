@@ -0,0 +1,200 @@
+"""Connection manager for using budget.db from more than one thread.
+
+One writer connection is shared by everyone and serialized with a lock;
+reads go through a bounded pool of query-only connections. In WAL mode the
+readers see the last committed state and never block on the writer, so
+reports, exports and table loads can run on worker threads while the GUI
+keeps writing.
+
+    manager = ConnectionManager()
+    with manager.reader() as conn:
+        rows = db.get_all_expenses(conn)
+    with manager.writer() as conn:
+        db.add_expense(conn, expense)
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import database as db
+
+
+class PoolTimeout(TimeoutError):
+    """No connection became available within the timeout."""
+
+
+class ThreadAffinityError(sqlite3.ProgrammingError):
+    """A checked-out connection was used from a thread that does not hold it."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that only the thread holding it may use.
+
+    The pool opens connections with check_same_thread=False so they can be
+    handed from thread to thread, and does its own check instead: while a
+    connection is checked out, `owner` is the holder's thread id.
+    """
+    owner = None
+
+    def _check_thread(self):
+        owner = self.owner
+        if owner is not None and owner != threading.get_ident():
+            raise ThreadAffinityError(
+                f"connection is checked out by thread {owner}, "
+                f"not thread {threading.get_ident()}")
+
+    def cursor(self, *args, **kwargs):
+        self._check_thread()
+        return super().cursor(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        self._check_thread()
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._check_thread()
+        return super().executemany(*args, **kwargs)
+
+
+@dataclass
+class PoolStats:
+    """Checkout counters; wait times are in seconds."""
+    checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    connections: int = 0
+
+    def record_wait(self, seconds):
+        self.waits += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+
+class ConnectionManager:
+    """One serialized writer connection plus a bounded pool of readers."""
+
+    def __init__(self, db_file=db.DB_FILE, config='desktop-safe',
+                 max_readers=4, timeout=30.0):
+        if max_readers < 1:
+            raise ValueError("max_readers must be at least 1")
+        self.db_file = db_file
+        self.config = db.get_config(config)
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self._closed = False
+
+        self._writer = self._open(query_only=False)
+        self._writer_lock = threading.Lock()
+        self.writer_stats = PoolStats(connections=1)
+
+        self._idle = []
+        self._reader_count = 0
+        self._readers_available = threading.Condition()
+        self.reader_stats = PoolStats()
+
+    def _open(self, query_only):
+        conn = sqlite3.connect(self.db_file, factory=PooledConnection,
+                               check_same_thread=False)
+        db.apply_config(conn, self.config)
+        if query_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @property
+    def writer_connection(self):
+        """The writer connection itself, for callers that serialize on their own."""
+        return self._writer
+
+    @contextmanager
+    def writer(self, timeout=None):
+        """Hold the writer connection exclusively for the duration of the block."""
+        timeout = self.timeout if timeout is None else timeout
+        if not self._writer_lock.acquire(blocking=False):
+            start = time.perf_counter()
+            acquired = self._writer_lock.acquire(timeout=timeout)
+            self.writer_stats.record_wait(time.perf_counter() - start)
+            if not acquired:
+                self.writer_stats.timeouts += 1
+                raise PoolTimeout(f"writer connection busy for {timeout}s")
+        try:
+            self._check_open()
+            self.writer_stats.checkouts += 1
+            self._writer.owner = threading.get_ident()
+            try:
+                yield self._writer
+            finally:
+                self._writer.owner = None
+        finally:
+            self._writer_lock.release()
+
+    @contextmanager
+    def reader(self, timeout=None):
+        """Check out a read-only connection for the duration of the block."""
+        conn = self.acquire_reader(timeout)
+        try:
+            yield conn
+        finally:
+            self.release_reader(conn)
+
+    def acquire_reader(self, timeout=None):
+        """Check out a read-only connection; pair with release_reader()."""
+        timeout = self.timeout if timeout is None else timeout
+        with self._readers_available:
+            self._check_open()
+            if not self._idle and self._reader_count < self.max_readers:
+                # Reserve the slot before the (slow) open so the bound holds.
+                self._reader_count += 1
+                self.reader_stats.connections = self._reader_count
+                try:
+                    conn = self._open(query_only=True)
+                except BaseException:
+                    self._reader_count -= 1
+                    self.reader_stats.connections = self._reader_count
+                    self._readers_available.notify()
+                    raise
+            else:
+                if not self._idle:
+                    start = time.perf_counter()
+                    got_one = self._readers_available.wait_for(
+                        lambda: self._idle or self._closed, timeout)
+                    self.reader_stats.record_wait(time.perf_counter() - start)
+                    if not got_one:
+                        self.reader_stats.timeouts += 1
+                        raise PoolTimeout(f"no reader connection free for {timeout}s")
+                    self._check_open()
+                conn = self._idle.pop()
+            self.reader_stats.checkouts += 1
+            conn.owner = threading.get_ident()
+            return conn
+
+    def release_reader(self, conn):
+        """Return a connection obtained from acquire_reader() to the pool."""
+        conn._check_thread()
+        if conn.in_transaction:
+            conn.rollback()
+        conn.owner = None
+        with self._readers_available:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.append(conn)
+                self._readers_available.notify()
+
+    def _check_open(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("connection manager is closed")
+
+    def close(self):
+        """Close the writer and every idle reader; busy readers close on release."""
+        with self._readers_available:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._readers_available.notify_all()
+        with self._writer_lock:
+            self._writer.close()
@@ -0,0 +1,62 @@
+"""Typed rows returned by the database.py readers.
+
+Every reader returns one of the row types below instead of a bare tuple.
+They are namedtuples, so existing positional code (row[0], unpacking,
+enumerate(row)) keeps working, while new code can say row.amount. A
+namedtuple instance is exactly as large as the tuple sqlite3 would have
+returned; see benchmarks/bench_row_types.py for how that compares with
+sqlite3.Row, dicts and __slots__ classes.
+
+The rows are built by row_factory(), which is installed as the cursor's
+row_factory so each row is constructed only once.
+"""
+from collections import namedtuple
+
+from money import Money
+
+# Fields holding integer cents in the database and Money in the row.
+MONEY_FIELDS = ('amount', 'total')
+
+Expense = namedtuple('Expense', 'amount date time category')
+Income = namedtuple('Income', 'date source amount notes')
+Budget = namedtuple('Budget', 'name amount')
+SavingsGoal = namedtuple('SavingsGoal', 'goal date')
+Transaction = namedtuple('Transaction', 'date description amount type')
+CategoryTotal = namedtuple('CategoryTotal', 'category total')
+RecentExpense = namedtuple('RecentExpense', 'category amount')
+RecentGoal = namedtuple('RecentGoal', 'goal')
+LatestIncome = namedtuple('LatestIncome', 'date source amount')
+RollupRow = namedtuple('RollupRow', 'bucket name count total')
+RollupTotal = namedtuple('RollupTotal', 'bucket count total')
+
+
+def money_field(row_type):
+    """Index of row_type's Money field, or None."""
+    for name in MONEY_FIELDS:
+        if name in row_type._fields:
+            return row_type._fields.index(name)
+    return None
+
+
+def row_factory(row_type, keyed=False):
+    """A sqlite3 row_factory that builds row_type from each result row.
+
+    The result columns must be row_type's fields in order. With keyed=True
+    they are followed by the (date, id) keyset columns, and the factory
+    returns (row, (date, id)) pairs instead.
+    """
+    # tuple.__new__ skips the namedtuple's argument handling; the column
+    # count is fixed by the query, so there is nothing to check per row.
+    new = tuple.__new__
+    i = money_field(row_type)
+    if i is None:
+        if keyed:
+            return lambda cursor, row: (new(row_type, row[:-2]), row[-2:])
+        return lambda cursor, row: new(row_type, row)
+    if keyed:
+        def build(cursor, row):
+            return new(row_type, (*row[:i], Money(row[i]), *row[i + 1:-2])), row[-2:]
+    else:
+        def build(cursor, row):
+            return new(row_type, (*row[:i], Money(row[i]), *row[i + 1:]))
+    return build
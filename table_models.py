@@ -0,0 +1,401 @@
+"""Qt table models over the database.py table views.
+
+QTableWidget keeps a QTableWidgetItem, with its own copy of the text, for
+every cell, and filling one costs an insertRow() plus an item per cell.
+LedgerTableModel instead keeps each column of a TABLE_VIEWS view in one
+compact container (integer cents in an array('q'), text in a list whose
+equal strings share a single object) and formats a cell only when a view
+asks to draw it. Sorting by a header re-runs the query with a different
+ORDER BY, so it happens in SQL:
+
+    model = LedgerTableModel('expenses', ['Amount', 'Date', 'Time', 'Category'], conn)
+    model.reload()
+    view = replace_with_view(ui.expenseTable, model)
+
+Rows are read a keyset page at a time. reload() reads the first page only
+and the view asks for the rest through canFetchMore()/fetchMore() as it
+is scrolled down; table_view() asks half a page early, so the next page is
+there before the last row comes into sight. At most max_pages pages are
+held at once. The least recently drawn are dropped, all but their cursor
+and row count, and read again if they are scrolled back to.
+
+Given a jobs.JobRunner as `jobs`, the model reads those pages on its pool
+instead of on conn, so scrolling never waits on a query. The view shows
+the rows being read blank, and fills them in once their page arrives.
+
+Each page remembers the largest row ids its read saw (see
+db.get_table_view_seen), so insert_row() can tell a row the page already
+holds from a new one, however the read and the insert's event were
+ordered on their way to the GUI thread.
+"""
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtWidgets import QAbstractItemView, QTableView
+
+import database as db
+from money import Money
+
+
+class _Page:
+    """One fetched page of rows; columns and ids are None once it is dropped."""
+    __slots__ = ('after', 'last', 'count', 'seen', 'columns', 'ids')
+
+    def __init__(self, after, last, count, seen, columns, ids):
+        self.after = after      # cursor the page was read from, None for the first
+        self.last = last        # (sort value, id) of its last row
+        self.count = count
+        self.seen = seen        # base table -> largest id in the view when it was read
+        self.columns = columns
+        self.ids = ids
+
+
+def read_page(conn, view, sort, cursor, count):
+    """db.get_table_view_page() plus the db.get_table_view_seen() it was read at."""
+    with db.read_snapshot(conn):
+        return (*db.get_table_view_page(conn, view, sort, cursor, count),
+                db.get_table_view_seen(conn, view))
+
+
+class LedgerTableModel(QAbstractTableModel):
+    """Read-only rows of one database.py TABLE_VIEWS view, read page by page.
+
+    headers name the columns to show; a view may select more (budgets
+    select the date they are listed by), and those are kept but not shown.
+    """
+    PAGE_SIZE = 500
+    MAX_PAGES = 40
+    PREFETCH_ROWS = PAGE_SIZE // 2
+
+    def __init__(self, view, headers, conn=None, parent=None, max_pages=MAX_PAGES, loader=None,
+                 jobs=None):
+        super().__init__(parent)
+        self.view = view
+        self.headers = list(headers)
+        self.conn = conn
+        self.max_pages = max_pages
+        # loader(model, sort) re-reads the model in a new order, e.g. on a
+        # worker thread; without one sort() calls reload().
+        self.loader = loader
+        self.jobs = jobs
+        self._generation = 0    # bumped whenever the rows are replaced
+        self._reading = set()   # keys of the page reads submitted to jobs
+        self.kinds = db.TABLE_VIEWS[view][1]
+        self.sort_column, self.descending = db.TABLE_VIEWS[view][2]
+        self._reset(complete=True)
+
+    def _reset(self, complete):
+        # Page reads still running were for the rows being replaced.
+        self._generation += 1
+        for key in self._reading:
+            self.jobs.cancel(key)
+        self._reading.clear()
+        self._pages = []
+        self._starts = []       # row number of each page's first row
+        self._rows = 0
+        self._loaded = OrderedDict()    # numbers of held pages, least recently used first
+        self._cursor = None     # where the next fetchMore() reads from
+        self._complete = complete
+        self._strings = {}      # one shared object per distinct text value
+        self._names = {}        # nocase_key(name) -> name as the model holds it
+
+    def _empty(self):
+        return [array('q') if kind == 'money' else [] for kind in self.kinds], array('q')
+
+    # --- Loading ---
+    def reload(self, conn=None):
+        """Drop every row and read the view's first page."""
+        if conn is not None:
+            self.conn = conn
+        self.show_first_page(self.read_first_page(self.conn))
+
+    def read_first_page(self, conn, sort=None):
+        """What reload() shows, read on conn; sort defaults to the current order.
+
+        Touches nothing but conn, so it can run on a worker thread while
+        the GUI thread goes on using the model.
+        """
+        sort = sort or (self.sort_column, self.descending)
+        return (sort, *read_page(conn, self.view, sort, None, self.PAGE_SIZE))
+
+    def show_first_page(self, page):
+        """Replace every row with a read_first_page() result, taking on its order."""
+        sort, rows, cursor, seen = page
+        self.beginResetModel()
+        self.sort_column, self.descending = sort
+        self._reset(complete=False)
+        self._add_page(rows, cursor, seen)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._reset(complete=True)
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._complete
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._read((self, 'more'), self._cursor, self.PAGE_SIZE, self._show_more)
+
+    def _show_more(self, after, page):
+        rows, cursor, seen = page
+        if after != self._cursor:
+            return
+        if not rows:
+            self._complete = True
+            return
+        self.beginInsertRows(QModelIndex(), self._rows, self._rows + len(rows) - 1)
+        self._add_page(rows, cursor, seen)
+        self.endInsertRows()
+
+    def _read(self, key, cursor, count, deliver):
+        """Read count rows after cursor, on jobs if there is one, then deliver(cursor, page).
+
+        Nothing is delivered once the rows have been replaced, and a key
+        already being read is not read twice.
+        """
+        sort = (self.sort_column, self.descending)
+        if self.jobs is None:
+            deliver(cursor, read_page(self.conn, self.view, sort, cursor, count))
+            return
+        if key in self._reading:
+            return
+        generation = self._generation
+
+        def show(page):
+            if generation == self._generation:
+                self._reading.discard(key)
+                deliver(cursor, page)
+        self._reading.add(key)
+        self.jobs.submit(key, read_page, show, self.view, sort, cursor, count)
+
+    def _add_page(self, rows, cursor, seen):
+        self._complete = cursor is None
+        if not rows:
+            return
+        last = rows[-1]
+        self._pages.append(_Page(self._cursor, (last[self.sort_column], last[-1]), len(rows),
+                                 seen, *self._unpack(rows)))
+        self._starts.append(self._rows)
+        self._rows += len(rows)
+        self._cursor = cursor
+        self._touch(len(self._pages) - 1)
+
+    def _unpack(self, rows):
+        share = self._strings.setdefault
+        columns, ids = self._empty()
+        if not rows:
+            return columns, ids
+        values = list(zip(*rows))
+        for column, kind, data in zip(columns, self.kinds, values):
+            if kind == 'money':
+                column.extend(data)
+            else:
+                column.extend([share(value, value) for value in data])
+                if kind == 'name':
+                    for name in column:
+                        self._names.setdefault(db.nocase_key(name), name)
+        ids.extend(values[-1])
+        return columns, ids
+
+    def _touch(self, number):
+        """Mark page number as just used, dropping the oldest beyond max_pages."""
+        self._loaded[number] = None
+        self._loaded.move_to_end(number)
+        while len(self._loaded) > self.max_pages:
+            page = self._pages[self._loaded.popitem(last=False)[0]]
+            page.columns = page.ids = None
+
+    def _page(self, number):
+        """Page number, or None while it is being read again."""
+        page = self._pages[number]
+        if page.columns is None:
+            self._read((self, number), page.after, page.count,
+                       lambda after, read, number=number: self._show_page(number, read[0]))
+            if page.columns is None:
+                return None
+        self._touch(number)
+        return page
+
+    def _show_page(self, number, rows):
+        page = self._pages[number]
+        if page.columns is not None:
+            return
+        if self.jobs is not None and (len(rows) != page.count or self._sort_key(
+                (rows[-1][self.sort_column], rows[-1][-1])) != self._sort_key(page.last)):
+            # A row was added to the page after it was counted; the insert
+            # of it is still on its way, and has the page read again.
+            return
+        page.columns, page.ids = self._unpack(rows)
+        self._touch(number)
+        first = self._starts[number]
+        if self.jobs is not None:
+            self.dataChanged.emit(self.index(first, 0),
+                                  self.index(first + page.count - 1, self.columnCount() - 1))
+
+    # --- Inserts ---
+    def insert_row(self, values, row_id, table=None):
+        """Add a newly inserted row where the current sort order puts it.
+
+        values holds the view's columns (amounts as cents) and table the
+        base table the row went into. The row is taken to be the newest,
+        so it goes first among rows it ties with when sorted descending, as
+        the id tiebreak would put it. A row that sorts after every row
+        fetched so far is left for fetchMore() to read, and one that its
+        page was read after is there already; None is returned for those,
+        else the row number.
+        """
+        # The database files 'food' under an existing 'Food'; show it so.
+        values = [self._names.setdefault(db.nocase_key(value), value) if kind == 'name' else value
+                  for kind, value in zip(self.kinds, values)]
+        last = (values[self.sort_column], row_id)
+        key = self._sort_key(last)
+        number = self._page_for_key(key)
+        if number is None:
+            if not self._complete:
+                return None
+            if not self._pages:
+                self._pages.append(_Page(None, last, 0, {}, *self._empty()))
+                self._starts.append(0)
+                self._touch(0)
+            number = len(self._pages) - 1
+            self._pages[number].last = last
+        page = self._pages[number]
+        if table is not None and row_id <= page.seen.get(table, 0):
+            return None
+        # A dropped page is read again in full when it is next drawn, so
+        # the row only needs counting there; it goes in as its first row
+        # until then.
+        offset = 0 if page.columns is None else self._offset_in_page(page, key)
+        row = self._starts[number] + offset
+        self.beginInsertRows(QModelIndex(), row, row)
+        if page.columns is not None:
+            for column, value in zip(page.columns, values):
+                column.insert(offset, value)
+            page.ids.insert(offset, row_id)
+        page.count += 1
+        for later in range(number + 1, len(self._starts)):
+            self._starts[later] += 1
+        self._rows += 1
+        self.endInsertRows()
+        return row
+
+    def _sort_key(self, last):
+        value, row_id = last
+        if self.kinds[self.sort_column] == 'name':
+            value = db.nocase_key(value)
+        return value, row_id
+
+    def _before(self, a, b):
+        return a > b if self.descending else a < b
+
+    def _page_for_key(self, key):
+        """Number of the first page whose last row key sorts before, or None."""
+        low, high = 0, len(self._pages)
+        while low < high:
+            mid = (low + high) // 2
+            if self._before(key, self._sort_key(self._pages[mid].last)):
+                high = mid
+            else:
+                low = mid + 1
+        return low if low < len(self._pages) else None
+
+    def _offset_in_page(self, page, key):
+        column = page.columns[self.sort_column]
+        low, high = 0, len(page.ids)
+        while low < high:
+            mid = (low + high) // 2
+            if self._before(key, self._sort_key((column[mid], page.ids[mid]))):
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        number = bisect_right(self._starts, index.row()) - 1
+        page = self._page(number)
+        if page is None:
+            return None
+        offset = index.row() - self._starts[number]
+        if offset >= len(page.ids):
+            # Rows were deleted behind the model's back; a reload will follow.
+            return None
+        value = page.columns[index.column()][offset]
+        if self.kinds[index.column()] == 'money':
+            return str(Money(value))
+        return value
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        descending = order == Qt.DescendingOrder
+        # -1 is "no sort column": the budgets' hidden date order.
+        if column < 0 or (column, descending) == (self.sort_column, self.descending):
+            return
+        if self.loader is not None:
+            self.loader(self, (column, descending))
+        elif self.conn is not None:
+            self.show_first_page(self.read_first_page(self.conn, (column, descending)))
+        else:
+            self.sort_column, self.descending = column, descending
+
+
+def header_labels(table_widget):
+    """The column titles set on a designer QTableWidget."""
+    return [table_widget.horizontalHeaderItem(column).text()
+            for column in range(table_widget.columnCount())]
+
+
+def table_view(parent, model):
+    """A QTableView of model that sorts it when a header is clicked."""
+    view = QTableView(parent)
+    view.setModel(model)
+    view.setSelectionBehavior(QAbstractItemView.SelectRows)
+    # Show the model's own order in the header before sorting is switched
+    # on, or enabling it would re-sort by the first column.
+    view.horizontalHeader().setSortIndicator(
+        model.sort_column if model.sort_column < model.columnCount() else -1,
+        Qt.DescendingOrder if model.descending else Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+    # QTableView only fetches more once the last row is reached; fetch
+    # before that, with the scroll bar counting rows.
+    view.setVerticalScrollMode(QAbstractItemView.ScrollPerItem)
+    scroll_bar = view.verticalScrollBar()
+
+    def prefetch(value):
+        if value >= scroll_bar.maximum() - model.PREFETCH_ROWS:
+            model.fetchMore()
+    scroll_bar.valueChanged.connect(prefetch)
+    return view
+
+
+def replace_with_view(table_widget, model):
+    """Put a table_view() of model where table_widget was, and hide the widget."""
+    view = table_view(table_widget.parentWidget(), model)
+    view.setObjectName(table_widget.objectName())
+    view.setGeometry(table_widget.geometry())
+    layout = table_widget.parentWidget().layout()
+    if layout is not None:
+        layout.replaceWidget(table_widget, view)
+    table_widget.hide()
+    return view
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import database as db
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A connection to a new database at SCHEMA_VERSION."""
+    conn = db.create_connection(str(tmp_path / 'budget.db'))
+    db.create_all_tables(conn)
+    yield conn
+    conn.close()
@@ -0,0 +1,74 @@
+import sqlite3
+
+import database as db
+from cache import CachedReaders, QueryCache
+from events import LedgerSummary
+from money import Money
+
+
+def insert_elsewhere(conn, sql):
+    """Commit sql on a plain connection of its own, as a script would."""
+    other = sqlite3.connect(db.get_database_file(conn))
+    with other:
+        other.execute(sql)
+    other.close()
+
+
+def test_unchanged_tables_are_served_from_memory(conn):
+    readers = CachedReaders()
+    db.add_income(conn, (100, 'Job', '2024-01-01', None))
+    assert readers.get_total_income(conn) == Money.of(100)
+    db.add_expense(conn, (5, 'Food', '2024-01-02', '12:00:00'))
+    assert readers.get_total_income(conn) == Money.of(100)
+    assert (readers.cache.stats.hits, readers.cache.stats.misses) == (1, 1)
+
+
+def test_commit_from_another_connection_invalidates(conn):
+    readers = CachedReaders()
+    assert readers.get_all_budgets(conn) == []
+    insert_elsewhere(conn, "INSERT INTO budgets(name, amount, date) VALUES ('Rent', 70000, '2024-01-01')")
+    assert [budget.name for budget in readers.get_all_budgets(conn)] == ['Rent']
+    assert readers.cache.stats.stale == 1
+
+
+def test_databases_do_not_share_entries(conn, tmp_path):
+    readers = CachedReaders()
+    second = db.create_connection(str(tmp_path / 'second.db'))
+    db.create_all_tables(second)
+    db.add_income(conn, (100, 'Job', '2024-01-01', None))
+    assert readers.get_total_income(conn) == Money.of(100)
+    assert readers.get_total_income(second) == Money()
+    second.close()
+
+
+def test_reads_inside_a_transaction_bypass_the_cache(conn):
+    readers = CachedReaders()
+    try:
+        with db.transaction(conn):
+            db.add_income(conn, (100, 'Job', '2024-01-01', None))
+            assert readers.get_total_income(conn) == Money.of(100)
+            raise RuntimeError("rolled back")
+    except RuntimeError:
+        pass
+    assert readers.get_total_income(conn) == Money()
+    assert readers.cache.stats.entries == 1
+
+
+def test_summary_from_cache_matches_its_seen_ids(conn):
+    readers = CachedReaders()
+    db.add_saving_goal(conn, ('Car', '2024-01-01'))
+    LedgerSummary().load(readers, conn)
+    insert_elsewhere(conn, "INSERT INTO savings_goals(goal, date) VALUES ('House', '2024-01-02')")
+    summary = LedgerSummary()
+    summary.load(readers, conn)
+    assert summary.seen['savings_goals'] == 2
+    assert [row.goal for row in summary.recent_goals] == ['House', 'Car']
+
+
+def test_least_recently_used_entries_are_evicted(conn):
+    cache = QueryCache(max_entries=2)
+    for limit in (1, 2, 1, 3):
+        cache.call(db.get_recent_expenses, ('expenses',), conn, limit=limit)
+    assert cache.stats.evictions == 1
+    cache.call(db.get_recent_expenses, ('expenses',), conn, limit=1)
+    assert cache.stats.hits == 2
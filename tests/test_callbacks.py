@@ -0,0 +1,33 @@
+import logging
+
+from events import DataCleared, EventBus
+from pages import PageScheduler
+
+
+def fail(*args):
+    raise RuntimeError("widget broke")
+
+
+def test_failing_handler_is_logged_and_the_rest_still_run(caplog):
+    bus = EventBus()
+    seen = []
+    bus.subscribe(DataCleared, fail)
+    bus.subscribe(DataCleared, seen.append)
+    with caplog.at_level(logging.ERROR, logger='budgetpal'):
+        bus.publish(DataCleared())
+    assert seen == [DataCleared()]
+    [record] = caplog.records
+    assert record.getMessage() == "Error handling DataCleared"
+    assert record.exc_info[0] is RuntimeError
+
+
+def test_failing_refresh_does_not_keep_the_page_stale(caplog):
+    pages = PageScheduler(current=0)
+    ran = []
+    pages.schedule(1, fail)
+    pages.schedule(1, lambda: ran.append(1))
+    with caplog.at_level(logging.ERROR, logger='budgetpal'):
+        pages.show(1)
+    assert ran == [1]
+    assert not pages.is_stale(1)
+    assert "widget broke" in caplog.text
@@ -0,0 +1,177 @@
+import sqlite3
+
+import pytest
+
+import database as db
+from money import Money
+
+
+def create_v0_database(path, monkeypatch):
+    """A database as BudgetPal created it before it had schema versions."""
+    with monkeypatch.context() as patch:
+        patch.setattr(db, 'migrate', lambda conn: 0)
+        conn = db.create_connection(str(path))
+        db.create_all_tables(conn)
+    return conn
+
+
+def test_hot_queries_are_served_from_indexes(conn):
+    assert db.check_query_plans(conn) == []
+
+
+# --- Migrations ---
+def test_migrate_populated_v0_database(tmp_path, monkeypatch):
+    conn = create_v0_database(tmp_path / 'budget.db', monkeypatch)
+    conn.executemany("INSERT INTO expenses(amount, category, date, time) VALUES (?, ?, ?, ?)",
+                     [(0.1, 'Food', '2024-01-05', '08:00:00'),
+                      (0.2, 'food', '2024-01-20', '09:00:00'),
+                      (19.99, 'Rent', '2024-02-01', '10:00:00')])
+    conn.executemany("INSERT INTO income(amount, source, date, notes) VALUES (?, ?, ?, ?)",
+                     [(1000.5, 'Job', '2024-01-01', 'year-end bonus'),
+                      (250, 'Gift', '2024-02-14', None)])
+    conn.execute("INSERT INTO budgets(name, amount, date) VALUES ('Bills', 1500.25, '2024-01-01')")
+    conn.execute("INSERT INTO savings_goals(goal, date) VALUES ('New laptop', '2024-01-01')")
+    conn.commit()
+
+    assert db.migrate(conn) == db.SCHEMA_VERSION == db.get_schema_version(conn)
+
+    # Amounts are exact cents, and names differing only in case are one category.
+    assert db.get_total_expenses(conn) == Money.of('20.29')
+    assert db.get_total_income(conn) == Money.of('1250.50')
+    assert [name for _, name in db.get_categories(conn)] == ['Food', 'Rent']
+    assert db.get_expenses_by_category(conn) == [('Food', Money.of('0.30')),
+                                                 ('Rent', Money.of('19.99'))]
+    assert db.get_all_expenses(conn)[1] == (Money.of('0.20'), '2024-01-20', '09:00:00', 'Food')
+    assert db.get_all_budgets(conn) == [('Bills', Money.of('1500.25'))]
+    assert db.get_rollup(conn, 'expenses', 'month', group_by=False) == [
+        ('2024-01', 2, Money.of('0.30')), ('2024-02', 1, Money.of('19.99'))]
+    assert db.verify_totals(conn) == []
+    assert db.check_category_totals(conn) == []
+    assert [(hit.kind, hit.id) for hit in db.search(conn, 'bonus')] == [('income', 1)]
+    assert [(hit.kind, hit.id) for hit in db.search(conn, 'rent')] == [('expense', 3)]
+    assert [(hit.kind, hit.id) for hit in db.search(conn, 'laptop')] == [('savings_goal', 1)]
+    assert db.check_query_plans(conn) == []
+
+
+def test_v4_category_totals_follow_expenses(tmp_path, monkeypatch):
+    conn = create_v0_database(tmp_path / 'budget.db', monkeypatch)
+    monkeypatch.setattr(db, 'SCHEMA_VERSION', 4)
+    db.migrate(conn)
+    conn.executemany("INSERT INTO expenses(amount, category, date, time) VALUES (?, ?, ?, ?)",
+                     [(1.5, 'Food', '2024-01-01', ''), (4.0, 'Food', '2024-01-02', ''),
+                      (2.0, 'Rent', '2024-01-03', '')])
+    conn.execute("UPDATE expenses SET category = 'Rent' WHERE id = 2")
+    conn.execute("DELETE FROM expenses WHERE id = 3")
+    assert conn.execute("SELECT * FROM expense_category_totals ORDER BY category").fetchall() == [
+        ('Food', 1, 1.5, 1.5, 1.5), ('Rent', 1, 4.0, 4.0, 4.0)]
+
+
+def test_failed_migration_raises_and_keeps_last_version(tmp_path, monkeypatch):
+    conn = create_v0_database(tmp_path / 'budget.db', monkeypatch)
+
+    def broken(cur):
+        cur.execute("CREATE TABLE broken_step (id integer)")
+        cur.execute("CREATE TABLE expenses (id integer)")
+
+    monkeypatch.setattr(db, 'MIGRATIONS', [*db.MIGRATIONS[:2], broken])
+    monkeypatch.setattr(db, 'SCHEMA_VERSION', 3)
+    with pytest.raises(sqlite3.OperationalError):
+        db.migrate(conn)
+    assert db.get_schema_version(conn) == 2
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'broken_step'").fetchone() is None
+
+
+# --- Writes ---
+def test_failed_rename_leaves_no_transaction_open(conn):
+    db.add_expense(conn, ('1.00', 'Food', '2024-01-01', '08:00:00'))
+    db.add_expense(conn, ('2.00', 'Rent', '2024-01-01', '08:00:00'))
+    with pytest.raises(sqlite3.IntegrityError):
+        db.rename_category(conn, 'Food', 'rent')
+    assert not conn.in_transaction
+    db.add_expenses_bulk(conn, [('3.00', 'Food', '2024-01-02', '08:00:00')])
+    assert [name for _, name in db.get_categories(conn)] == ['Food', 'Rent']
+
+
+def test_failed_insert_does_not_keep_its_new_category(conn):
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_expense(conn, ('1.00', 'Orphan', None, '08:00:00'))
+    assert not conn.in_transaction
+    db.add_expense(conn, ('2.00', 'Food', '2024-01-01', '08:00:00'))
+    assert [name for _, name in db.get_categories(conn)] == ['Food']
+
+
+# --- Triggers ---
+def stored_rollups(conn):
+    return {rollup: sorted(conn.execute(f"SELECT * FROM {rollup}"))
+            for rollup, _, _ in db.ROLLUPS.values()}
+
+
+def test_triggers_keep_derived_tables_current_after_update_and_delete(conn):
+    db.add_expenses_bulk(conn, [('10.00', 'Food', '2024-01-01', '08:00:00'),
+                                ('2.50', 'Food', '2024-01-02', '08:00:00'),
+                                ('7.00', 'Rent', '2024-02-01', '08:00:00'),
+                                ('1.25', 'Fun', '2024-02-03', '08:00:00')])
+    db.add_income_bulk(conn, [('100.00', 'Job', '2024-01-01', ''),
+                              ('0.10', 'Gift', '2024-01-15', 'cash')])
+    with db.transaction(conn):
+        conn.execute("UPDATE expenses SET amount = 400 WHERE id = 2")
+        # Move Food's largest expense to Rent, and delete Rent's own.
+        conn.execute("UPDATE expenses SET category_id = (SELECT id FROM categories "
+                     "WHERE name = 'Rent'), date = '2024-03-01' WHERE id = 1")
+        conn.execute("DELETE FROM expenses WHERE id = 3")
+        conn.execute("DELETE FROM expenses WHERE id = 4")
+        conn.execute("DELETE FROM income")
+
+    assert db.get_total_expenses(conn) == Money.of('14.00')
+    assert db.get_total_income(conn) == Money()
+    assert db.verify_totals(conn) == []
+    assert db.check_category_totals(conn) == []
+    assert conn.execute("SELECT row_count, total, min_amount, max_amount "
+                        "FROM expense_category_totals ORDER BY category_id").fetchall() == [
+        (1, 400, 400, 400), (1, 1000, 1000, 1000)]
+    rollups = stored_rollups(conn)
+    db.rebuild_rollups(conn)
+    assert stored_rollups(conn) == rollups
+
+
+# --- Keyset pages ---
+def populate_ties(conn):
+    """Income and expenses sharing dates, amounts and names, so sorts tie."""
+    db.add_income_bulk(conn, [(100, 'Job', f'2024-01-0{1 + i % 2}', 'note' if i % 3 else '')
+                              for i in range(5)])
+    db.add_expenses_bulk(conn, [(5, 'Food' if i % 2 else 'food', f'2024-01-0{1 + i % 2}',
+                                 '12:00:00') for i in range(6)])
+    db.add_budgets_bulk(conn, [('Bills', 10, '2024-01-01') for _ in range(3)])
+    db.add_saving_goals_bulk(conn, [('Trip', '2024-01-01') for _ in range(3)])
+
+
+def walk_pages(read_page, page_size):
+    rows, cursor = read_page(None, page_size)
+    while cursor is not None:
+        page, cursor = read_page(cursor, page_size)
+        assert page
+        rows.extend(page)
+    return rows
+
+
+@pytest.mark.parametrize('page_size', [1, 2, 3])
+def test_transactions_page_resumes_across_type_ties(conn, page_size):
+    populate_ties(conn)
+    everything = list(db.iter_transactions(conn))
+    assert len(everything) == 11
+    assert everything == sorted(everything, key=lambda row: (row.date, row.type), reverse=True)
+    assert walk_pages(lambda cursor, size: db.get_transactions_page(conn, cursor, size),
+                      page_size) == everything
+
+
+@pytest.mark.parametrize('view', db.TABLE_VIEWS)
+def test_table_view_pages_resume_across_ties(conn, view):
+    populate_ties(conn)
+    for column in range(len(db.TABLE_VIEWS[view][1])):
+        for descending in (True, False):
+            sort = (column, descending)
+            everything, cursor = db.get_table_view_page(conn, view, sort, page_size=1000)
+            assert cursor is None
+            for page_size in (1, 2):
+                assert walk_pages(lambda cursor, size: db.get_table_view_page(
+                    conn, view, sort, cursor, size), page_size) == everything, sort
@@ -0,0 +1,33 @@
+import asyncio
+
+import database as db
+from aio import AsyncDatabase
+from money import Money
+from writer import GroupCommitWriter
+
+
+def test_writer_queues_every_write_function(conn, tmp_path):
+    writer = GroupCommitWriter(str(tmp_path / 'budget.db'))
+    try:
+        assert all(callable(getattr(writer, name)) for name in db.WRITE_FUNCTIONS)
+        future = writer.add_expense(('12.50', 'Food', '2024-01-01', '12:00:00'))
+        assert future.result(timeout=5) == 1
+        assert writer.rename_category('Food', 'Groceries').result(timeout=5)
+    finally:
+        writer.close()
+    assert db.get_all_expenses(conn) == [(Money.of('12.50'), '2024-01-01', '12:00:00', 'Groceries')]
+
+
+def test_async_database_reads_writes_and_iterates(conn, tmp_path):
+    async def run():
+        async with AsyncDatabase(str(tmp_path / 'budget.db')) as adb:
+            assert all(callable(getattr(adb, name)) for name in db.WRITE_FUNCTIONS)
+            await adb.add_income_bulk([('100', 'Job', '2024-01-01', ''),
+                                       ('50', 'Gift', '2024-01-02', '')])
+            total = await adb.get_total_income()
+            rows = [row async for row in adb.iter_income(batch_size=1)]
+        return total, rows
+
+    total, rows = asyncio.run(run())
+    assert total == Money.of('150')
+    assert [row.source for row in rows] == ['Gift', 'Job']
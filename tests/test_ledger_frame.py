@@ -0,0 +1,14 @@
+import database as db
+from ledger_frame import LedgerFrame
+
+
+def test_by_month_matches_the_month_rollup(conn):
+    db.add_expenses_bulk(conn, [('1.25', 'Food', '2024-01-05', '08:00:00'),
+                                ('2.00', 'Rent', '2024-01-31', '08:00:00'),
+                                ('3.10', 'Food', '2024-03-01', '08:00:00')])
+    frame = LedgerFrame()
+    frame.refresh(conn)
+    by_month = frame.expenses.by_month()
+    assert by_month == [(row.bucket, row.total)
+                        for row in db.get_rollup(conn, 'expenses', 'month', group_by=False)]
+    assert all(type(label) is str for label, _ in by_month)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import pytest
+
+from money import MAX_CENTS, Money
+
+
+@pytest.mark.parametrize('value, cents', [
+    ('19.99', 1999),
+    (' 1,234.5 ', 123450),
+    ('0.005', 1),
+    ('0.004', 0),
+    ('-0.005', -1),
+    ('2.675', 268),
+    (Decimal('2.675'), 268),
+    (0.1, 10),
+    (2.675, 268),
+    (3, 300),
+    (Money(42), 42),
+])
+def test_of_rounds_half_up_to_the_cent(value, cents):
+    assert Money.of(value).cents == cents
+
+
+@pytest.mark.parametrize('value', ['', 'abc', '1.2.3', 'nan', 'inf', float('nan'), float('-inf')])
+def test_of_rejects_what_is_not_an_amount(value):
+    with pytest.raises(ValueError):
+        Money.of(value)
+
+
+@pytest.mark.parametrize('value', ['1e400', '-1e400', '1e17', -1e17, 10**17,
+                                   Decimal(MAX_CENTS + 1).scaleb(-2)])
+def test_of_rejects_amounts_too_large_to_store(value):
+    with pytest.raises(ValueError):
+        Money.of(value)
+
+
+def test_of_takes_the_largest_storable_amount():
+    assert Money.of(Decimal(-MAX_CENTS).scaleb(-2)).cents == -MAX_CENTS
+
+
+@pytest.mark.parametrize('value', [True, None, [1]])
+def test_of_rejects_other_types(value):
+    with pytest.raises(TypeError):
+        Money.of(value)
+
+
+def test_takes_only_integer_cents():
+    with pytest.raises(TypeError):
+        Money(1.5)
+    assert Money(7).cents == 7
+
+
+def test_arithmetic_and_formatting_are_exact():
+    price = Money.of('0.10')
+    assert sum([price] * 3) == Money.of('0.30')
+    assert price * 3 - Money.of('0.30') == Money()
+    assert f"P{Money.of('1234.5'):,.2f}" == 'P1,234.50'
+    assert str(Money(-5)) == '-0.05'
+    assert repr(Money.of('19.99')) == "Money.of('19.99')"
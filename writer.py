@@ -0,0 +1,148 @@
+"""Write-behind queue with group commit.
+
+GroupCommitWriter runs every write on one background thread. Writes that
+arrive within `window` seconds of each other are applied in a single
+transaction, so a burst of N entries costs one commit (and one fsync)
+instead of N. Each write still gets its own savepoint, so a failing write
+does not take the rest of its batch down with it.
+
+    writer = GroupCommitWriter()
+    future = writer.add_expense((12.5, 'Food', '2024-01-01', '12:00:00'))
+    row_id = future.result()   # resolves once the batch has committed
+
+Futures resolve only after the commit that made their write durable, and
+batches commit in submission order.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import database as db
+
+_STOP = object()
+
+
+@dataclass
+class WriterStats:
+    batches: int = 0
+    writes: int = 0
+    failed: int = 0
+
+
+class GroupCommitWriter:
+    """Single writer thread that coalesces queued writes into shared commits."""
+
+    def __init__(self, db_file=db.DB_FILE, config='desktop-safe', manager=None,
+                 window=0.005, max_batch=500):
+        self.db_file = db_file
+        self.config = db.get_config(config)
+        self.manager = manager
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = WriterStats()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._conn = None
+        self._ready = Future()
+        self._thread = threading.Thread(target=self._run, name='budgetpal-writer',
+                                        daemon=True)
+        self._thread.start()
+        # Surface connection errors here instead of on the first write.
+        self._ready.result()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(conn, *args, **kwargs); returns a Future of its result."""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._queue.put((func, args, kwargs, future))
+        return future
+
+    def flush(self, timeout=None):
+        """Block until every write queued so far has been committed."""
+        self.submit(lambda conn: None).result(timeout)
+
+    def close(self, timeout=None):
+        """Commit whatever is still queued, then stop the writer thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _checkout(self):
+        if self.manager is not None:
+            return self.manager.writer()
+        return nullcontext(self._conn)
+
+    def _run(self):
+        if self.manager is None:
+            try:
+                self._conn = sqlite3.connect(self.db_file)
+                db.apply_config(self._conn, self.config)
+            except Exception as e:
+                self._ready.set_exception(e)
+                return
+        self._ready.set_result(None)
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.window
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 \
+                            else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                self._commit_batch(batch)
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+
+    def _commit_batch(self, batch):
+        outcomes = []
+        try:
+            with self._checkout() as conn, db.transaction(conn):
+                for func, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.transaction(conn):
+                            outcomes.append((future, func(conn, *args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The batch never committed: nothing in it is durable.
+            for *_, future in batch:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+                    self.stats.failed += 1
+            return
+        self.stats.batches += 1
+        for future, result, error in outcomes:
+            if error is None:
+                self.stats.writes += 1
+                future.set_result(result)
+            else:
+                self.stats.failed += 1
+                future.set_exception(error)
+
+
+db.add_facade_methods(GroupCommitWriter, db.WRITE_FUNCTIONS, 'submit',
+                      doc="Queue db.{name}(); returns a Future of its result.")